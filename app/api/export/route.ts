@@ -1,27 +1,115 @@
 import { NextRequest, NextResponse } from 'next/server'
-import { zipFiles } from '@/lib/zip'
-import { GeneratedFilesSchema } from '@/lib/validation'
+import { parseCompressionProfile } from '@/lib/zip'
+import { archiveETag, buildArchive, exportFormat, parseExportFormat } from '@/lib/archives'
+import { canInlineHtml } from '@/lib/html-bundle'
+import { ExportRequestSchema, GeneratedFiles } from '@/lib/validation'
+import { loadProject, projectIdFromDigests } from '@/lib/projects'
+import { compressionPool } from '@/lib/compression-pool'
+import { etagMatches } from '@/lib/http'
+
+// GET /api/export?projectId=... lets the browser cache the archive and
+// revalidate it with If-None-Match instead of downloading it again
+export async function GET(req: NextRequest) {
+  try {
+    const id = req.nextUrl.searchParams.get('projectId') || ''
+    const files = await loadProject(id)
+    if (!files) return projectNotFound()
+
+    return archiveResponse(req, files, id, true)
+  } catch (error: any) {
+    console.error('Export error:', error)
+    
+    return NextResponse.json(
+      { error: error.message || 'Failed to export files' },
+      { status: 500 }
+    )
+  }
+}
 
 export async function POST(req: NextRequest) {
   try {
     const body = await req.json()
-    const validatedData = GeneratedFilesSchema.parse(body)
-    
-    const buffer = await zipFiles(validatedData.files)
-    
-    return new NextResponse(buffer as any, {
-      status: 200,
-      headers: {
-        'Content-Type': 'application/zip',
-        'Content-Disposition': `attachment; filename="site-${Date.now()}.zip"`
-      }
-    })
+    const validatedData = ExportRequestSchema.parse(body)
+
+    // Conditional POSTs would call for 412 rather than 304, so only GET revalidates
+    if ('projectId' in validatedData) {
+      const files = await loadProject(validatedData.projectId)
+      if (!files) return projectNotFound()
+      return archiveResponse(req, files, validatedData.projectId, false)
+    }
+
+    // Inline files remain for old clients. Their hashes give the id and key
+    // the entry cache, so each file is hashed once, on the compression pool.
+    const { files } = validatedData
+    const digests = await compressionPool.digest(files.map(file => file.content))
+    return archiveResponse(req, files, projectIdFromDigests(files, digests), false, digests)
   } catch (error: any) {
     console.error('Export error:', error)
+
+    if (error.name === 'ZodError') {
+      return NextResponse.json(
+        { error: 'Invalid request data', details: error.errors },
+        { status: 400 }
+      )
+    }
     
     return NextResponse.json(
       { error: error.message || 'Failed to export files' },
       { status: 500 }
     )
   }
-}
\ No newline at end of file
+}
+
+function projectNotFound() {
+  return NextResponse.json(
+    { error: 'Project not found or expired' },
+    { status: 404 }
+  )
+}
+
+// Stored projects are keyed by their content address, so a stored project's
+// id stands in for hashing its files
+function archiveResponse(
+  req: NextRequest,
+  files: GeneratedFiles['files'],
+  projectId: string,
+  conditional: boolean,
+  digests?: string[]
+) {
+  // ?format=tar.gz or ?format=html; ZIP otherwise
+  const format = parseExportFormat(req.nextUrl.searchParams.get('format'))
+  // ?compression=max trades CPU for a slightly smaller archive
+  const profile = parseCompressionProfile(req.nextUrl.searchParams.get('compression'))
+
+  if (format === 'html' && !canInlineHtml(files)) {
+    return NextResponse.json(
+      { error: 'Single-file HTML export is only available for vanilla sites' },
+      { status: 400 }
+    )
+  }
+
+  const etag = archiveETag(projectId, format, profile)
+  const headers: Record<string, string> = {
+    ETag: etag,
+    'Cache-Control': 'private, no-cache'
+  }
+
+  if (conditional && etagMatches(req, etag)) {
+    return new NextResponse(null, { status: 304, headers })
+  }
+
+  // Cached archives come back whole; otherwise entries are compressed as the
+  // client reads, so nothing waits on the whole archive
+  const { body } = buildArchive(files, format, profile, etag, digests)
+  const { contentType, extension } = exportFormat(format)
+  if (Buffer.isBuffer(body)) headers['Content-Length'] = String(body.length)
+
+  return new NextResponse(body as any, {
+    status: 200,
+    headers: {
+      ...headers,
+      'Content-Type': contentType,
+      'Content-Disposition': `attachment; filename="site-${Date.now()}.${extension}"`
+    }
+  })
+}
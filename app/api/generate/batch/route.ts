@@ -0,0 +1,75 @@
+import { NextRequest, NextResponse } from 'next/server'
+import { BatchRequest, BatchRequestSchema } from '@/lib/validation'
+import { parseGenerationMode } from '@/lib/ai'
+import { generateBatch } from '@/lib/batch'
+import { encodeNdjson } from '@/lib/ndjson'
+import { clientKey } from '@/lib/http'
+
+const BATCH_CONCURRENCY = Number(process.env.BATCH_CONCURRENCY) || 4
+
+// Streams one NDJSON event per request as it finishes (item or error, tagged
+// with the request's index), then done
+export async function POST(req: NextRequest) {
+  let validatedData: BatchRequest
+  try {
+    const body = await req.json()
+    validatedData = BatchRequestSchema.parse(body)
+  } catch (error: any) {
+    if (error.name === 'ZodError') {
+      return NextResponse.json(
+        { error: 'Invalid request data', details: error.errors },
+        { status: 400 }
+      )
+    }
+    return NextResponse.json({ error: 'Invalid JSON body' }, { status: 400 })
+  }
+
+  const noCache = req.headers.get('cache-control')?.includes('no-cache')
+  // Aborted when the client goes away, so queued and running generations are
+  // given up instead of spending tokens on results nobody reads
+  const abort = new AbortController()
+  const options = {
+    cache: !noCache,
+    mode: parseGenerationMode(req.nextUrl.searchParams.get('mode')),
+    // Interactive requests are served first when the upstream is saturated
+    priority: 'batch' as const,
+    clientKey: clientKey(req),
+    signal: abort.signal
+  }
+
+  const stream = new ReadableStream<Uint8Array>({
+    async start(controller) {
+      // Enqueueing on or closing a cancelled stream throws
+      const send = (event: unknown) => {
+        if (!abort.signal.aborted) controller.enqueue(encodeNdjson(event))
+      }
+
+      try {
+        let failed = 0
+        for await (const event of generateBatch(validatedData.requests, BATCH_CONCURRENCY, options)) {
+          if (event.type === 'error') failed++
+          send(event)
+        }
+        send({ type: 'done', count: validatedData.requests.length, failed })
+      } catch (error: any) {
+        if (abort.signal.aborted) return
+        console.error('Batch generation error:', error)
+        send({ type: 'error', error: error.message || 'Failed to generate batch' })
+      } finally {
+        if (!abort.signal.aborted) controller.close()
+      }
+    },
+
+    cancel() {
+      abort.abort()
+    }
+  })
+
+  return new Response(stream, {
+    headers: {
+      'Content-Type': 'application/x-ndjson; charset=utf-8',
+      'Cache-Control': 'no-cache, no-transform',
+      'X-Accel-Buffering': 'no'
+    }
+  })
+}
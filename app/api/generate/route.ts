@@ -1,17 +1,32 @@
 import { NextRequest, NextResponse } from 'next/server'
 import { BuildRequestSchema } from '@/lib/validation'
-import { generateSitePlan } from '@/lib/ai'
-import { buildFilesFromPlan } from '@/lib/codegen'
+import { generateSitePlan, parseGenerationMode } from '@/lib/ai'
+import { buildFilesFromPlan, sectionRevisions } from '@/lib/codegen'
+import { clientKey, queueFullResponse } from '@/lib/http'
+import { saveProject } from '@/lib/projects'
 
 export async function POST(req: NextRequest) {
   try {
     const body = await req.json()
     const validatedData = BuildRequestSchema.parse(body)
     
-    const plan = await generateSitePlan(validatedData)
-    const files = buildFilesFromPlan(plan, validatedData.framework)
+    const noCache = req.headers.get('cache-control')?.includes('no-cache')
+    // ?mode=sections generates each section in its own concurrent completion
+    const mode = parseGenerationMode(req.nextUrl.searchParams.get('mode'))
     
-    return NextResponse.json({ plan, files })
+    const plan = await generateSitePlan(validatedData, {
+      cache: !noCache,
+      mode,
+      priority: 'interactive',
+      clientKey: clientKey(req)
+    })
+    const { framework } = validatedData
+    const revisions = sectionRevisions(plan)
+    const files = buildFilesFromPlan(plan, framework, revisions)
+    // Kept server-side so export only needs the id
+    const projectId = await saveProject(files.files, { plan, framework, revisions })
+    
+    return NextResponse.json({ plan, files, projectId })
   } catch (error: any) {
     console.error('Generation error:', error)
     
@@ -21,6 +36,14 @@ export async function POST(req: NextRequest) {
         { status: 400 }
       )
     }
+
+    if (error.name === 'QueueFullError') {
+      return queueFullResponse(error)
+    }
+
+    if (error.name === 'TimeoutError') {
+      return NextResponse.json({ error: error.message }, { status: 504 })
+    }
     
     return NextResponse.json(
       { error: error.message || 'Failed to generate site' },
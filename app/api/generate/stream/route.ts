@@ -0,0 +1,96 @@
+import { NextRequest, NextResponse } from 'next/server'
+import { BuildRequest, BuildRequestSchema } from '@/lib/validation'
+import { storeSitePlan, streamSitePlan } from '@/lib/ai'
+import { buildFilesFromPlan, newRevision, renderSectionFragment } from '@/lib/codegen'
+import { PlanStreamParser } from '@/lib/plan-stream'
+import { encodeNdjson } from '@/lib/ndjson'
+import { clientKey } from '@/lib/http'
+import { saveProject } from '@/lib/projects'
+
+// Streams newline-delimited JSON events: meta, assets, section (with its
+// rendered fragment), style, then done with the full plan and files
+export async function POST(req: NextRequest) {
+  let validatedData: BuildRequest
+  try {
+    const body = await req.json()
+    validatedData = BuildRequestSchema.parse(body)
+  } catch (error: any) {
+    if (error.name === 'ZodError') {
+      return NextResponse.json(
+        { error: 'Invalid request data', details: error.errors },
+        { status: 400 }
+      )
+    }
+    return NextResponse.json({ error: 'Invalid JSON body' }, { status: 400 })
+  }
+
+  const noCache = req.headers.get('cache-control')?.includes('no-cache')
+  const { framework } = validatedData
+  // Aborted when the client goes away, so the upstream completion and its
+  // scheduler slot are given up instead of running to the end
+  const abort = new AbortController()
+  const options = {
+    cache: !noCache,
+    priority: 'interactive' as const,
+    clientKey: clientKey(req),
+    signal: abort.signal
+  }
+
+  const stream = new ReadableStream<Uint8Array>({
+    async start(controller) {
+      // Enqueueing on or closing a cancelled stream throws
+      const send = (event: unknown) => {
+        if (!abort.signal.aborted) controller.enqueue(encodeNdjson(event))
+      }
+
+      try {
+        const parser = new PlanStreamParser()
+        const revisions: string[] = []
+
+        for await (const chunk of streamSitePlan(validatedData, options)) {
+          for (const event of parser.push(chunk)) {
+            if (event.type === 'section') {
+              // The final build finds this fragment cached under the revision
+              const revision = newRevision()
+              revisions.push(revision)
+              send({ ...event, fragment: renderSectionFragment(event.section, framework, revision) })
+            } else {
+              send(event)
+            }
+          }
+        }
+
+        const plan = parser.end()
+        if (!noCache) await storeSitePlan(validatedData, plan)
+
+        const files = buildFilesFromPlan(plan, framework, revisions)
+        const projectId = await saveProject(files.files, { plan, framework, revisions })
+        send({ type: 'done', plan, files, projectId })
+      } catch (error: any) {
+        if (abort.signal.aborted) return
+        console.error('Generation stream error:', error)
+        send({
+          type: 'error',
+          error: error.message || 'Failed to generate site',
+          // Headers are already sent, so the status the JSON route would
+          // answer with is reported in-band: 429 when shed, 504 at the deadline
+          status: error.name === 'QueueFullError' ? 429 : error.name === 'TimeoutError' ? 504 : 500
+        })
+      } finally {
+        if (!abort.signal.aborted) controller.close()
+      }
+    },
+
+    cancel() {
+      abort.abort()
+    }
+  })
+
+  return new Response(stream, {
+    headers: {
+      'Content-Type': 'application/x-ndjson; charset=utf-8',
+      'Cache-Control': 'no-cache, no-transform',
+      'X-Accel-Buffering': 'no'
+    }
+  })
+}
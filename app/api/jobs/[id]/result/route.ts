@@ -0,0 +1,29 @@
+import { NextRequest, NextResponse } from 'next/server'
+import { generationJobs, jobStatus } from '@/lib/generation-jobs'
+
+// Returns { plan, files } once the job has succeeded
+export async function GET(_req: NextRequest, { params }: { params: Promise<{ id: string }> }) {
+  const { id } = await params
+  const job = generationJobs.get(id)
+
+  if (!job) {
+    return NextResponse.json({ error: 'Job not found or expired' }, { status: 404 })
+  }
+
+  // The status the synchronous routes answer the same failure with
+  if (job.status === 'failed') {
+    return NextResponse.json(jobStatus(job), {
+      status: job.errorStatus ?? 500,
+      headers: job.retryAfterMs ? { 'Retry-After': String(Math.ceil(job.retryAfterMs / 1000)) } : undefined
+    })
+  }
+
+  if (job.status !== 'succeeded') {
+    return NextResponse.json(jobStatus(job), {
+      status: 202,
+      headers: { 'Retry-After': '1', 'Cache-Control': 'no-store' }
+    })
+  }
+
+  return NextResponse.json(job.result)
+}
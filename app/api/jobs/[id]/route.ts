@@ -0,0 +1,15 @@
+import { NextRequest, NextResponse } from 'next/server'
+import { generationJobs, jobStatus } from '@/lib/generation-jobs'
+
+export async function GET(_req: NextRequest, { params }: { params: Promise<{ id: string }> }) {
+  const { id } = await params
+  const job = generationJobs.get(id)
+
+  if (!job) {
+    return NextResponse.json({ error: 'Job not found or expired' }, { status: 404 })
+  }
+
+  return NextResponse.json(jobStatus(job), {
+    headers: { 'Cache-Control': 'no-store' }
+  })
+}
@@ -0,0 +1,47 @@
+import { NextRequest, NextResponse } from 'next/server'
+import { BuildRequestSchema } from '@/lib/validation'
+import { parseGenerationMode } from '@/lib/ai'
+import { generationJobs, jobStatus } from '@/lib/generation-jobs'
+import { clientKey, queueFullResponse } from '@/lib/http'
+
+// Queues a generation and returns its job id without waiting for the model
+export async function POST(req: NextRequest) {
+  try {
+    const body = await req.json()
+    const validatedData = BuildRequestSchema.parse(body)
+
+    const noCache = req.headers.get('cache-control')?.includes('no-cache')
+    const job = generationJobs.submit({
+      request: validatedData,
+      options: {
+        cache: !noCache,
+        mode: parseGenerationMode(req.nextUrl.searchParams.get('mode')),
+        priority: 'interactive',
+        clientKey: clientKey(req)
+      }
+    })
+
+    return NextResponse.json(jobStatus(job), {
+      status: 202,
+      headers: { Location: `/api/jobs/${job.id}` }
+    })
+  } catch (error: any) {
+    console.error('Job submit error:', error)
+
+    if (error.name === 'ZodError') {
+      return NextResponse.json(
+        { error: 'Invalid request data', details: error.errors },
+        { status: 400 }
+      )
+    }
+
+    if (error.name === 'QueueFullError') {
+      return queueFullResponse(error)
+    }
+
+    return NextResponse.json(
+      { error: error.message || 'Failed to submit job' },
+      { status: 500 }
+    )
+  }
+}
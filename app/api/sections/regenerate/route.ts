@@ -0,0 +1,74 @@
+import { NextRequest, NextResponse } from 'next/server'
+import { SectionEditRequestSchema } from '@/lib/validation'
+import { regenerateSection } from '@/lib/ai'
+import { buildFilesFromPlan, newRevision, sectionRevisions } from '@/lib/codegen'
+import { clientKey, queueFullResponse } from '@/lib/http'
+import { diffFiles, diffJson } from '@/lib/diff'
+import { loadProject, loadProjectSource, saveProject } from '@/lib/projects'
+
+// Regenerates one section of a stored project. Responds with an RFC 6902 patch
+// from the project's plan and a line-level delta from its files; a client
+// whose project has expired posts the plan instead and gets full files back.
+export async function POST(req: NextRequest) {
+  try {
+    const body = await req.json()
+    const request = SectionEditRequestSchema.parse(body)
+
+    const source = request.projectId ? await loadProjectSource(request.projectId) : undefined
+    const base = source && (await loadProject(request.projectId!))
+    const plan = source?.plan ?? request.plan
+    const framework = source?.framework ?? request.framework
+    if (!plan) {
+      return NextResponse.json({ error: 'Project not found or expired' }, { status: 409 })
+    }
+
+    const index = plan.sections.findIndex(section => section.id === request.sectionId)
+    if (index < 0) {
+      return NextResponse.json({ error: `Section "${request.sectionId}" not found` }, { status: 404 })
+    }
+
+    const section = await regenerateSection(plan, index, request.instruction, {
+      priority: 'interactive',
+      clientKey: clientKey(req)
+    })
+
+    const sections = plan.sections.slice()
+    sections[index] = section
+    const updated = { ...plan, sections }
+    // Untouched sections keep their revision and come from the fragment cache
+    const revisions = (source?.revisions ?? sectionRevisions(plan)).slice()
+    revisions[index] = newRevision()
+    const files = buildFilesFromPlan(updated, framework, revisions).files
+
+    return NextResponse.json({
+      section,
+      planPatch: diffJson(plan, updated),
+      // The delta only applies to the exact files the client holds, which
+      // are the stored base revision; anything else gets the whole set
+      ...(base ? { baseProjectId: request.projectId, filesDelta: diffFiles(base, files) } : { files }),
+      projectId: await saveProject(files, { plan: updated, framework, revisions })
+    })
+  } catch (error: any) {
+    console.error('Section regeneration error:', error)
+
+    if (error.name === 'ZodError') {
+      return NextResponse.json(
+        { error: 'Invalid request data', details: error.errors },
+        { status: 400 }
+      )
+    }
+
+    if (error.name === 'QueueFullError') {
+      return queueFullResponse(error)
+    }
+
+    if (error.name === 'TimeoutError') {
+      return NextResponse.json({ error: error.message }, { status: 504 })
+    }
+
+    return NextResponse.json(
+      { error: error.message || 'Failed to regenerate section' },
+      { status: 500 }
+    )
+  }
+}
@@ -8,6 +8,8 @@ import { Card, CardContent } from "@/components/ui/card";
 import { Button } from "@/components/ui/button";
 import { Textarea } from "@/components/ui/textarea";
 import { Sparkles, ArrowRight } from "lucide-react";
+import { readNdjson } from "@/lib/ndjson";
+import { storeResult } from "@/lib/result-store";
 
 export default function Home() {
   const [prompt, setPrompt] = useState("");
@@ -34,29 +36,25 @@ export default function Home() {
     }
   }, []);
 
-  const handleResult = (data: any) => {
-    if (typeof window !== "undefined") {
-      (window as any).__generatedData = data;
-      // Navigate to preview page
-      router.push("/preview");
-    }
-  };
-
   const handleQuickGenerate = async () => {
     if (!prompt.trim()) return;
 
     setIsGenerating(true);
 
     // Navigate to preview immediately to show loading state
-    const loadingData = {
-      plan: { meta: { title: "Generating...", description: prompt } },
+    let data: any = {
+      plan: {
+        meta: { title: "Generating...", description: prompt },
+        sections: [],
+      },
       files: { files: [] },
       isLoading: true,
     };
-    handleResult(loadingData);
+    storeResult(data);
+    router.push("/preview");
 
     try {
-      const response = await fetch("/api/generate", {
+      const response = await fetch("/api/generate/stream", {
         method: "POST",
         headers: {
           "Content-Type": "application/json",
@@ -94,8 +92,34 @@ export default function Home() {
         throw new Error(errorData.error || "Failed to generate site");
       }
 
-      const data = await response.json();
-      handleResult({ ...data, isLoading: false });
+      // Sections arrive one by one while the model is still writing
+      for await (const event of readNdjson(response.body!)) {
+        switch (event.type) {
+          case "meta":
+          case "assets":
+          case "style":
+            data = {
+              ...data,
+              plan: { ...data.plan, [event.type]: event[event.type] },
+            };
+            break;
+          case "section":
+            data = {
+              ...data,
+              plan: {
+                ...data.plan,
+                sections: [...data.plan.sections, event.section],
+              },
+            };
+            break;
+          case "done":
+            data = { plan: event.plan, files: event.files, projectId: event.projectId, isLoading: false };
+            break;
+          case "error":
+            throw new Error(event.error);
+        }
+        storeResult(data);
+      }
     } catch (error: any) {
       console.error("Generation error:", error);
 
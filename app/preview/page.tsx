@@ -13,19 +13,116 @@ import {
   CardTitle,
 } from "@/components/ui/card";
 import { Button } from "@/components/ui/button";
-import { FileCode2, Home, Eye, Download } from "lucide-react";
+import { FileCode2, Home, Eye, Download, Pencil } from "lucide-react";
+import { applyFilesDelta, applyJsonPatch } from "@/lib/diff";
+import { RESULT_EVENT, latestResult, loadResult, storeResult } from "@/lib/result-store";
+
+// The generated file set tells which framework the plan was rendered for
+function frameworkOf(files: { path: string }[]) {
+  if (files.some((file) => file.path === "index.html")) return "vanilla";
+  if (files.some((file) => file.path === "src/App.jsx")) return "react";
+  return "next";
+}
 
 export default function Preview() {
   const [data, setData] = useState<any>(null);
+  const [editingSection, setEditingSection] = useState<string | null>(null);
   const containerRef = useRef<HTMLDivElement>(null);
   const cardsRef = useRef<HTMLDivElement[]>([]);
 
   useEffect(() => {
-    if (typeof window !== "undefined" && (window as any).__generatedData) {
-      setData((window as any).__generatedData);
+    // A project named in the URL wins; the in-memory copy from the generator
+    // is only used when it is that project, or when the URL names none.
+    // Otherwise the project is read from local storage.
+    let received = false;
+    const projectId = new URLSearchParams(window.location.search).get("project");
+    const latest = latestResult();
+    if (latest && (!projectId || latest.projectId === projectId)) {
+      setData(latest);
+    } else {
+      loadResult(projectId || undefined)
+        .then((stored) => {
+          if (stored && !received) setData(stored);
+        })
+        .catch((error) => console.warn("Failed to load saved result:", error));
     }
+
+    const onData = (event: Event) => {
+      received = true;
+      setData((event as CustomEvent).detail);
+    };
+    window.addEventListener(RESULT_EVENT, onData);
+    return () => window.removeEventListener(RESULT_EVENT, onData);
   }, []);
 
+  // Puts the project in the URL so a reload or a copied link opens it again
+  useEffect(() => {
+    if (data?.projectId) {
+      window.history.replaceState(null, "", `/preview?project=${data.projectId}`);
+    }
+  }, [data?.projectId]);
+
+  // Only the changed section is regenerated; the response is a plan patch
+  // and a line delta for the files, applied on top of what we already have.
+  // The server edits its stored copy of the project, so the plan is only
+  // uploaded when that copy has expired.
+  const editSection = async (sectionId: string) => {
+    const instruction = window.prompt("How should this section change?");
+    if (!instruction?.trim()) return;
+
+    setEditingSection(sectionId);
+    try {
+      const send = (plan?: any) =>
+        fetch("/api/sections/regenerate", {
+          method: "POST",
+          headers: { "Content-Type": "application/json" },
+          body: JSON.stringify({
+            projectId: data.projectId,
+            plan,
+            sectionId,
+            instruction,
+            framework: frameworkOf(data.files.files),
+          }),
+        });
+      let response = await send(data.projectId ? undefined : data.plan);
+      if (response.status === 409) response = await send(data.plan);
+      const result = await response.json();
+      if (!response.ok) {
+        throw new Error(result.error || "Failed to update section");
+      }
+
+      let plan;
+      try {
+        plan = applyJsonPatch(data.plan, result.planPatch);
+      } catch {
+        // The server's plan had drifted from ours; swap in the section
+        plan = {
+          ...data.plan,
+          sections: data.plan.sections.map((section: any) =>
+            section.id === sectionId ? result.section : section
+          ),
+        };
+      }
+      const files =
+        result.filesDelta && result.baseProjectId === data.projectId
+          ? applyFilesDelta(data.files.files, result.filesDelta)
+          : result.files;
+
+      const next = {
+        ...data,
+        plan,
+        files: { files },
+        projectId: result.projectId,
+      };
+      storeResult(next);
+      setData(next);
+    } catch (error: any) {
+      alert(error.message || "Failed to update section");
+    } finally {
+      setEditingSection(null);
+    }
+  };
+
   useEffect(() => {
     if (data && containerRef.current) {
       gsap.fromTo(
@@ -103,7 +200,7 @@ export default function Preview() {
               <Button variant="outline" asChild>
                 <a href="/">← New Project</a>
               </Button>
-              <ExportButtons files={data.files?.files || []} />
+              <ExportButtons files={data.files?.files || []} projectId={data.projectId} />
             </div>
           </div>
 
@@ -127,6 +224,46 @@ export default function Preview() {
             </CardContent>
           </Card>
 
+          {/* Sections */}
+          {!data.isLoading && data.plan?.sections?.length > 0 && (
+            <Card className="bg-background/95 backdrop-blur-xl shadow-2xl">
+              <CardHeader>
+                <CardTitle>Sections</CardTitle>
+                <CardDescription>
+                  Rewrite a single section without regenerating the site
+                </CardDescription>
+              </CardHeader>
+              <CardContent>
+                <div className="space-y-2">
+                  {data.plan.sections.map((section: any) => (
+                    <div
+                      key={section.id}
+                      className="flex items-center justify-between border rounded-lg px-4 py-2 bg-card/50"
+                    >
+                      <div className="flex items-center gap-3 min-w-0">
+                        <span className="text-xs uppercase text-muted-foreground">
+                          {section.type}
+                        </span>
+                        <span className="text-sm font-medium truncate">
+                          {section.props?.title || section.id}
+                        </span>
+                      </div>
+                      <Button
+                        variant="outline"
+                        size="sm"
+                        onClick={() => editSection(section.id)}
+                        disabled={editingSection !== null}
+                      >
+                        <Pencil className="w-4 h-4" />
+                        {editingSection === section.id ? "Updating..." : "Edit"}
+                      </Button>
+                    </div>
+                  ))}
+                </div>
+              </CardContent>
+            </Card>
+          )}
+
           {/* File Structure */}
           {data.files?.files && (
             <Card
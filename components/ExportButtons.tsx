@@ -1,20 +1,36 @@
 'use client'
 
-import { Download, Eye, Rocket } from 'lucide-react'
+import { Download, Eye, FileCode, Rocket } from 'lucide-react'
 import { Button } from '@/components/ui/button'
+import { canInlineHtml } from '@/lib/html-bundle'
 
 interface ExportButtonsProps {
   files: any[]
+  projectId?: string
 }
 
-export default function ExportButtons({ files }: ExportButtonsProps) {
-  async function downloadZip() {
+type ExportFormat = 'zip' | 'tar.gz' | 'html'
+
+function requestExport(format: ExportFormat, body: object) {
+  return fetch(`/api/export?format=${format}`, {
+    method: 'POST',
+    headers: { 'Content-Type': 'application/json' },
+    body: JSON.stringify(body)
+  })
+}
+
+export default function ExportButtons({ files, projectId }: ExportButtonsProps) {
+  async function download(format: ExportFormat) {
     try {
-      const response = await fetch('/api/export', {
-        method: 'POST',
-        headers: { 'Content-Type': 'application/json' },
-        body: JSON.stringify({ files })
-      })
+      // The server keeps generated projects for a while; only upload the
+      // files when it no longer has this one. The GET form is revalidated
+      // from the browser cache, so a repeat download transfers nothing.
+      let response = projectId
+        ? await fetch(`/api/export?format=${format}&projectId=${encodeURIComponent(projectId)}`)
+        : undefined
+      if (!response || response.status === 404) {
+        response = await requestExport(format, { files })
+      }
       
       if (!response.ok) {
         throw new Error('Failed to export files')
@@ -24,7 +40,7 @@ export default function ExportButtons({ files }: ExportButtonsProps) {
       const url = URL.createObjectURL(blob)
       const a = document.createElement('a')
       a.href = url
-      a.download = `website-${Date.now()}.zip`
+      a.download = `website-${Date.now()}.${format}`
       a.click()
       URL.revokeObjectURL(url)
     } catch (error: any) {
@@ -34,10 +50,22 @@ export default function ExportButtons({ files }: ExportButtonsProps) {
 
   return (
     <div className="flex flex-wrap gap-3">
-      <Button onClick={downloadZip}>
+      <Button onClick={() => download('zip')}>
         <Download className="w-4 h-4" />
         Download ZIP
       </Button>
+
+      <Button variant="outline" onClick={() => download('tar.gz')}>
+        <Download className="w-4 h-4" />
+        .tar.gz
+      </Button>
+
+      {canInlineHtml(files) && (
+        <Button variant="outline" onClick={() => download('html')}>
+          <FileCode className="w-4 h-4" />
+          Single HTML file
+        </Button>
+      )}
       
       <Button variant="outline" disabled>
         <Eye className="w-4 h-4" />
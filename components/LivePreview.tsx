@@ -8,6 +8,9 @@ import { ScrollArea } from '@/components/ui/scroll-area'
 import { FileText, Monitor, Smartphone, Tablet } from 'lucide-react'
 import { motion } from 'framer-motion'
 import { cn } from '@/lib/utils'
+import { previewEntry } from '@/lib/preview-fs'
+import { appEntry } from '@/lib/preview-app'
+import PreviewFrame from '@/components/PreviewFrame'
 
 interface LivePreviewProps {
   initial?: any
@@ -25,6 +28,8 @@ export default function LivePreview({ initial }: LivePreviewProps) {
     }
   }, [initial])
 
+  const files = data?.files?.files
+
   if (!data || !data.plan) {
     return (
       <Card className="border-2 border-dashed bg-background/50">
@@ -45,36 +50,6 @@ export default function LivePreview({ initial }: LivePreviewProps) {
 
   const { plan } = data
 
-  // Get the HTML file content
-  const htmlFile = data.files?.files?.find((f: any) => f.path === 'index.html' || f.path.endsWith('.html'));
-  
-  // Get CSS content if available
-  const cssFile = data.files?.files?.find((f: any) => f.path === 'styles.css' || f.path.endsWith('.css'));
-  
-  // Get JS content if available  
-  const jsFile = data.files?.files?.find((f: any) => f.path === 'script.js' || f.path.endsWith('.js'));
-  
-  // Combine HTML with CSS and JS inline for proper rendering
-  const renderHtml = () => {
-    if (!htmlFile) return '';
-    
-    let htmlContent = htmlFile.content;
-    
-    // Inject CSS inline if it exists
-    if (cssFile && !htmlContent.includes('<style>')) {
-      const styleTag = `<style>${cssFile.content}</style>`;
-      htmlContent = htmlContent.replace('</head>', `${styleTag}</head>`);
-    }
-    
-    // Inject JS inline if it exists
-    if (jsFile && !htmlContent.includes('<script>')) {
-      const scriptTag = `<script>${jsFile.content}</script>`;
-      htmlContent = htmlContent.replace('</body>', `${scriptTag}</body>`);
-    }
-    
-    return htmlContent;
-  };
-
   const viewModeConfig = {
     desktop: { width: '100%', label: 'Desktop', icon: Monitor },
     tablet: { width: '768px', label: 'Tablet', icon: Tablet },
@@ -156,13 +131,8 @@ export default function LivePreview({ initial }: LivePreviewProps) {
           >
             <div className="h-[600px] overflow-hidden">
               {/* Render actual HTML if available */}
-              {htmlFile ? (
-                <iframe
-                  srcDoc={renderHtml()}
-                  className="w-full h-full border-0 bg-white"
-                  sandbox="allow-scripts allow-forms allow-modals allow-popups allow-same-origin"
-                  title="Website Preview"
-                />
+              {files && (previewEntry(files) || appEntry(files)) ? (
+                <PreviewFrame files={files} className="w-full h-full border-0 bg-white" />
               ) : (
                 <ScrollArea className="h-full">
                   <div className="p-6 space-y-6">
@@ -0,0 +1,157 @@
+'use client'
+
+import { useEffect, useMemo, useRef, useState } from 'react'
+import { appEntry, buildAppDocument } from '@/lib/preview-app'
+import { previewEntry, previewUrl, publishPreviewFiles } from '@/lib/preview-fs'
+import {
+  PATCH_MESSAGE,
+  READY_MESSAGE,
+  STALE_MESSAGE,
+  injectPreviewRuntime,
+  previewPatch,
+  withPreviewRuntime
+} from '@/lib/preview-patch'
+
+interface PreviewFrameProps {
+  files: any[]
+  className?: string
+  title?: string
+}
+
+// The generated site in an iframe. Where a service worker can serve the
+// files the iframe loads them by URL, so relative links, further pages and
+// unchanged assets work as deployed; until then, or where it cannot, it
+// shows an inline document. Later revisions that only change sections or
+// stylesheets are patched into the live page instead of reloading it. React and Next
+// projects are transpiled in the browser and run from an inline document.
+export default function PreviewFrame({ files, className, title = 'Website Preview' }: PreviewFrameProps) {
+  const frameRef = useRef<HTMLIFrameElement>(null)
+  // The files the page currently shows, whether loaded or patched in
+  const shownRef = useRef<any[]>()
+  const readyRef = useRef(false)
+  const [served, setServed] = useState<{ url?: string; document?: string }>()
+  // Bumped when the page asks for a reload after a patch it could not apply
+  const [reloads, setReloads] = useState(0)
+
+  // Built once per files revision, so re-renders neither rescan the files nor
+  // hand the iframe a new document to load
+  const previewDocument = useMemo(() => {
+    const document = buildPreviewDocument(files)
+    return document && injectPreviewRuntime(document)
+  }, [files])
+
+  useEffect(() => {
+    const onMessage = (event: MessageEvent) => {
+      if (event.source !== frameRef.current?.contentWindow) return
+      if (event.data?.type === READY_MESSAGE) readyRef.current = true
+      if (event.data?.type === STALE_MESSAGE) {
+        shownRef.current = undefined
+        setReloads(count => count + 1)
+      }
+    }
+    window.addEventListener('message', onMessage)
+    return () => window.removeEventListener('message', onMessage)
+  }, [])
+
+  useEffect(() => {
+    // Checked first, since React projects also ship a public/index.html
+    const app = appEntry(files)
+    if (app) {
+      let cancelled = false
+      buildAppDocument(files, app)
+        .catch(error => errorDocument(error.message))
+        .then(document => {
+          if (cancelled) return
+          shownRef.current = undefined
+          setServed({ document })
+        })
+      return () => { cancelled = true }
+    }
+
+    const entry = previewEntry(files)
+    if (!entry) return
+
+    const shown = shownRef.current
+    const patch = shown && readyRef.current ? previewPatch(shown, files, entry) : undefined
+    if (patch) {
+      frameRef.current?.contentWindow?.postMessage({ type: PATCH_MESSAGE, patch }, '*')
+      shownRef.current = files
+      return
+    }
+
+    // Nothing of this project on screen yet: show the inline document now
+    // rather than a blank frame while the worker starts, which can take
+    // seconds on first use, and move to the served URL once it is published
+    if (!shown && previewDocument) {
+      readyRef.current = false
+      shownRef.current = files
+      setServed({ document: previewDocument })
+    }
+
+    let cancelled = false
+    publishPreviewFiles(withPreviewRuntime(files, entry))
+      .then(revision => revision && previewUrl(revision, entry))
+      .catch(error => {
+        console.warn('Falling back to inline preview:', error)
+        return undefined
+      })
+      .then(url => {
+        if (cancelled || (!url && shownRef.current === files)) return
+        readyRef.current = false
+        shownRef.current = files
+        setServed(url ? { url } : { document: previewDocument })
+      })
+    return () => { cancelled = true }
+  }, [files, previewDocument, reloads])
+
+  return (
+    <iframe
+      // A fresh element when the page asked for a reload, even if the URL or document is unchanged
+      key={reloads}
+      ref={frameRef}
+      src={served?.url}
+      srcDoc={served?.document}
+      className={className}
+      sandbox="allow-scripts allow-forms allow-modals allow-popups allow-same-origin"
+      title={title}
+    />
+  )
+}
+
+// Shown when the project could not be transpiled at all
+function errorDocument(message: string): string {
+  const text = message.replace(/&/g, '&amp;').replace(/</g, '&lt;')
+  return `<pre style="color:#b91c1c;padding:16px;white-space:pre-wrap">${text}</pre>`
+}
+
+// Combine HTML with CSS and JS inline for proper rendering, finding the first
+// HTML, CSS and JS file in a single pass over the files
+function buildPreviewDocument(files?: any[]): string | undefined {
+  let htmlFile: any
+  let cssFile: any
+  let jsFile: any
+
+  for (const file of files || []) {
+    if (!htmlFile && file.path.endsWith('.html')) htmlFile = file
+    else if (!cssFile && file.path.endsWith('.css')) cssFile = file
+    else if (!jsFile && file.path.endsWith('.js')) jsFile = file
+  }
+
+  if (!htmlFile) return undefined
+
+  let htmlContent = htmlFile.content
+
+  // Inject CSS inline if it exists, tagged so hot patches can replace it
+  if (cssFile && !htmlContent.includes('<style>')) {
+    const styleTag = `<style data-preview-href="${cssFile.path}">${cssFile.content}</style>`
+    htmlContent = htmlContent.replace('</head>', `${styleTag}</head>`)
+  }
+
+  // Inject JS inline if it exists
+  if (jsFile && !htmlContent.includes('<script>')) {
+    const scriptTag = `<script>${jsFile.content}</script>`
+    htmlContent = htmlContent.replace('</body>', `${scriptTag}</body>`)
+  }
+
+  return htmlContent
+}
@@ -1,29 +1,330 @@
-import OpenAI from 'openai'
-import { BuildRequest, SitePlan } from './validation'
-import { SYSTEM_PROMPT, USER_PROMPT } from './prompts'
+import { BuildRequest, SitePlan, SitePlanSchema, SiteSection, SiteSectionSchema } from './validation'
+import {
+  OUTLINE_SYSTEM_PROMPT,
+  OUTLINE_USER_PROMPT,
+  PROMPT_VERSION,
+  SECTION_EDIT_USER_PROMPT,
+  SECTION_SYSTEM_PROMPT,
+  SECTION_USER_PROMPT,
+  SYSTEM_PROMPT,
+  USER_PROMPT
+} from './prompts'
+import { TieredCache } from './cache'
+import { hashValue } from './hash'
+import { globalSingleton } from './singleton'
+import { SingleFlight } from './single-flight'
+import { Priority, QueueFullError, ScheduleOptions, Scheduler } from './scheduler'
+import { ChatMessage, CompletionTask, getModelProvider } from './provider'
+import {
+  LatencyTracker,
+  RetryPolicy,
+  TimeoutError,
+  backoffDelay,
+  hedged,
+  isRetryable,
+  withDeadline,
+  withRetries,
+  withStreamDeadline
+} from './resilience'
+import { mapWithConcurrency, sleep } from './concurrency'
 
-const openai = new OpenAI({ 
-  apiKey: process.env.OPENAI_API_KEY!
-})
+const TEMPERATURE = 0.7
+const SECTION_CONCURRENCY = Number(process.env.PLAN_SECTION_CONCURRENCY) || 4
+// Rough completion size used to charge token budgets until usage is reported
+const RESPONSE_TOKEN_ESTIMATE = 1500
+
+const RETRY_POLICY: RetryPolicy = {
+  attempts: Number(process.env.AI_MAX_ATTEMPTS) || 3,
+  attemptTimeoutMs: Number(process.env.AI_ATTEMPT_TIMEOUT_MS) || 60 * 1000,
+  baseDelayMs: Number(process.env.AI_RETRY_BASE_MS) || 500,
+  maxDelayMs: Number(process.env.AI_RETRY_MAX_MS) || 8000
+}
+
+// Hedging waits for enough samples to trust the p95 estimate
+const HEDGE_ENABLED = process.env.AI_HEDGE === 'true'
+const HEDGE_MIN_SAMPLES = Number(process.env.AI_HEDGE_MIN_SAMPLES) || 20
+
+const planCache = globalSingleton('planCache', () => new TieredCache<SitePlan>({
+  ttlMs: Number(process.env.PLAN_CACHE_TTL_MS) || 60 * 60 * 1000,
+  maxEntries: Number(process.env.PLAN_CACHE_MAX_ENTRIES) || 500,
+  maxBytes: Number(process.env.PLAN_CACHE_MAX_BYTES) || 50 * 1024 * 1024,
+  dir: process.env.PLAN_CACHE_DIR || undefined,
+  maxDiskEntries: Number(process.env.PLAN_CACHE_MAX_DISK_ENTRIES) || 5000
+}))
+
+// Every upstream completion takes a slot here, so a traffic spike queues
+// instead of exhausting the provider's rate limit
+const scheduler = globalSingleton('aiScheduler', () => new Scheduler({
+  maxConcurrent: Number(process.env.AI_MAX_CONCURRENT) || 8,
+  maxQueue: Number(process.env.AI_MAX_QUEUE) || 100,
+  tokensPerMinute: Number(process.env.AI_TOKENS_PER_MINUTE) || undefined
+}))
+
+// Completion latencies per task kind; plans and single sections differ a lot
+const latencies = globalSingleton('aiLatencies', () => new Map<CompletionTask['kind'], LatencyTracker>())
+
+// Concurrent identical requests (double clicks, retries, several tabs) share one completion
+const inflightPlans = globalSingleton('inflightPlans', () => new SingleFlight<SitePlan>())
+
+// 'single' asks for the whole plan in one completion; 'sections' requests the
+// outline and every section concurrently and merges them
+export type GenerationMode = 'single' | 'sections'
+
+export interface GenerateOptions {
+  // Set to false to force a fresh completion, e.g. when the user asks to regenerate
+  cache?: boolean
+  mode?: GenerationMode
+  priority?: Priority
+  // Identifies the caller whose token budget is charged, e.g. client IP
+  clientKey?: string
+  // Aborts queued and running completions, e.g. when the client disconnects
+  signal?: AbortSignal
+}
+
+export function parseGenerationMode(value: string | null | undefined): GenerationMode | undefined {
+  return value === 'single' || value === 'sections' ? value : undefined
+}
+
+export function defaultGenerationMode(): GenerationMode {
+  return process.env.PLAN_GENERATION_MODE === 'sections' ? 'sections' : 'single'
+}
+
+export function planCacheKey(req: BuildRequest, mode: GenerationMode = 'single'): string {
+  return hashValue({
+    request: req,
+    model: getModelProvider().model,
+    temperature: TEMPERATURE,
+    promptVersion: PROMPT_VERSION,
+    systemPrompt: SYSTEM_PROMPT,
+    // Left out for 'single' so keys from before sectioned mode stay valid
+    mode: mode === 'sections' ? mode : undefined,
+    sectionPrompts: mode === 'sections' ? [OUTLINE_SYSTEM_PROMPT, SECTION_SYSTEM_PROMPT] : undefined
+  })
+}
+
+export function getPlanCacheStats() {
+  return planCache.stats()
+}
+
+export function getInflightStats() {
+  return inflightPlans.stats()
+}
+
+export function getSchedulerStats() {
+  return scheduler.stats()
+}
+
+export async function generateSitePlan(req: BuildRequest, options: GenerateOptions = {}): Promise<SitePlan> {
+  const useCache = options.cache !== false
+  const mode = options.mode ?? defaultGenerationMode()
+  const key = planCacheKey(req, mode)
+
+  if (useCache) {
+    const cached = await planCache.get(key)
+    if (cached) return cached
+  }
+
+  return inflightPlans.run(key, async signal => {
+    const shared = { ...options, signal }
+    const plan = mode === 'sections'
+      ? await requestSectionedPlan(req, shared)
+      : await requestSitePlan(req, shared)
+    if (useCache) await storeSitePlan(req, plan, mode)
+    return plan
+  }, options.signal)
+}
+
+export async function storeSitePlan(req: BuildRequest, plan: SitePlan, mode: GenerationMode = 'single'): Promise<void> {
+  // Only well-formed plans are worth replaying
+  if (SitePlanSchema.safeParse(plan).success) {
+    await planCache.set(planCacheKey(req, mode), plan)
+  }
+}
+
+// Yields the raw JSON text of the plan as the model produces it. A cached plan
+// is yielded as a single chunk; callers store fresh plans with storeSitePlan.
+export async function* streamSitePlan(req: BuildRequest, options: GenerateOptions = {}): AsyncGenerator<string> {
+  if (options.cache !== false) {
+    const cached = await planCache.get(planCacheKey(req))
+    if (cached) {
+      yield JSON.stringify(cached)
+      return
+    }
+  }
+
+  const messages = planMessages(req)
+  // The slot is held until the stream is drained or abandoned
+  const release = await scheduler.acquire(scheduleOptions(messages, options))
+  let usedTokens: number | undefined
 
-export async function generateSitePlan(req: BuildRequest): Promise<SitePlan> {
   try {
-    const completion = await openai.chat.completions.create({
-      model: 'gpt-4o-mini',
-      response_format: { type: 'json_object' },
-      messages: [
-        { role: 'system', content: SYSTEM_PROMPT },
-        { role: 'user', content: USER_PROMPT(req) }
-      ],
-      temperature: 0.7
+    // Once text has been handed out a retry would duplicate it, so only
+    // failures before the first delta are retried
+    for (let attempt = 1; ; attempt++) {
+      let started = false
+      try {
+        // The slot is already held, so the deadline covers only this attempt
+        const stream = withStreamDeadline(signal => getModelProvider().stream({
+          messages,
+          temperature: TEMPERATURE,
+          task: { kind: 'plan', request: req },
+          signal,
+          // Failed attempts count too: the provider billed them
+          onUsage: tokens => { usedTokens = (usedTokens ?? 0) + tokens }
+        }), RETRY_POLICY.attemptTimeoutMs, options.signal)
+
+        for await (const delta of stream) {
+          started = true
+          yield delta
+        }
+        return
+      } catch (error) {
+        if (!started && attempt < RETRY_POLICY.attempts && !options.signal?.aborted && isRetryable(error)) {
+          await sleep(backoffDelay(attempt, RETRY_POLICY), options.signal)
+          continue
+        }
+        throw generationError(error)
+      }
+    }
+  } finally {
+    release(usedTokens)
+  }
+}
+
+function planMessages(req: BuildRequest): ChatMessage[] {
+  return [
+    { role: 'system', content: SYSTEM_PROMPT },
+    { role: 'user', content: USER_PROMPT(req) }
+  ]
+}
+
+function scheduleOptions(messages: ChatMessage[], options: GenerateOptions): ScheduleOptions {
+  const promptChars = messages.reduce((sum, message) => sum + message.content.length, 0)
+  return {
+    priority: options.priority,
+    key: options.clientKey,
+    tokens: Math.ceil(promptChars / 4) + RESPONSE_TOKEN_ESTIMATE,
+    signal: options.signal
+  }
+}
+
+// Each attempt queues for its own scheduler slot, so retries and hedges count
+// against the concurrency cap like any other call. The deadline and the hedge
+// clock both start once the slot is granted: queueing is not the provider
+// being slow, and the p95 they compare against excludes it too.
+async function requestJson(messages: ChatMessage[], task: CompletionTask, options: GenerateOptions): Promise<any> {
+  const tracker = latencies.get(task.kind) ?? new LatencyTracker()
+  latencies.set(task.kind, tracker)
+
+  const attempt = (signal: AbortSignal, onStart?: () => void) => scheduler.run(reportUsage => {
+    onStart?.()
+    const started = Date.now()
+    return withDeadline(async deadlineSignal => {
+      const json = await getModelProvider().complete({
+        messages,
+        temperature: TEMPERATURE,
+        task,
+        signal: deadlineSignal,
+        onUsage: reportUsage
+      })
+      const parsed = JSON.parse(json)
+      tracker.record(Date.now() - started)
+      return parsed
+    }, RETRY_POLICY.attemptTimeoutMs, signal)
+  }, { ...scheduleOptions(messages, options), signal })
+
+  const p95 = HEDGE_ENABLED && tracker.count >= HEDGE_MIN_SAMPLES ? tracker.percentile(0.95) : undefined
+  const hedge = p95 ? { afterMs: p95, canHedge: () => !scheduler.saturated() } : undefined
+
+  // Only the first attempt hedges; a retry already follows a failure or timeout
+  return withRetries(
+    (signal, n) => hedge && n === 1 ? hedged(attempt, hedge, signal) : attempt(signal),
+    RETRY_POLICY,
+    options.signal
+  )
+}
+
+// Keeps timeouts distinguishable from other failures for the routes
+function generationError(error: unknown): Error {
+  // Shed and cancelled requests are expected, not failures worth logging
+  if (error instanceof QueueFullError || (error as Error)?.name === 'AbortError') return error as Error
+  console.error('AI generation error:', error)
+  if (error instanceof TimeoutError) return new TimeoutError('Site generation timed out')
+  return new Error('Failed to generate site plan')
+}
+
+async function requestSitePlan(req: BuildRequest, options: GenerateOptions): Promise<SitePlan> {
+  try {
+    return await requestJson(planMessages(req), { kind: 'plan', request: req }, options) as SitePlan
+  } catch (error) {
+    throw generationError(error)
+  }
+}
+
+// The outline does not feed the section prompts, so it runs alongside them and
+// wall-clock time tracks the slowest single completion
+async function requestSectionedPlan(req: BuildRequest, options: GenerateOptions): Promise<SitePlan> {
+  try {
+    const [outline, sections] = await Promise.all([
+      requestJson([
+        { role: 'system', content: OUTLINE_SYSTEM_PROMPT },
+        { role: 'user', content: OUTLINE_USER_PROMPT(req) }
+      ], { kind: 'outline', request: req }, options),
+      mapWithConcurrency(req.sections, SECTION_CONCURRENCY, (type, index) => requestSection(req, type, index, options))
+    ])
+
+    return SitePlanSchema.parse({
+      meta: outline.meta,
+      assets: outline.assets ?? { images: [] },
+      sections,
+      style: outline.style
     })
+  } catch (error) {
+    throw generationError(error)
+  }
+}
+
+async function requestSection(
+  req: BuildRequest,
+  type: BuildRequest['sections'][number],
+  index: number,
+  options: GenerateOptions
+): Promise<SiteSection> {
+  const section = await requestJson([
+    { role: 'system', content: SECTION_SYSTEM_PROMPT },
+    { role: 'user', content: SECTION_USER_PROMPT(req, type, index) }
+  ], { kind: 'section', request: req, sectionType: type, index }, options)
+
+  // Ids must stay unique once sections generated independently are merged
+  return SiteSectionSchema.parse({
+    ...section,
+    id: req.sections.indexOf(type) === index ? type : `${type}-${index + 1}`,
+    type
+  })
+}
+
+// Rewrites one section with only meta, colors and neighbouring section titles
+// as context. Edits are never cached: the same instruction twice should be
+// allowed to produce a different result.
+export async function regenerateSection(
+  plan: SitePlan,
+  index: number,
+  instruction: string,
+  options: GenerateOptions = {}
+): Promise<SiteSection> {
+  const section = plan.sections[index]
+  const neighbors = [plan.sections[index - 1], plan.sections[index + 1]]
+    .filter(Boolean)
+    .map(neighbor => `${neighbor.type}: ${neighbor.props.title ?? neighbor.id}`)
+
+  try {
+    const edited = await requestJson([
+      { role: 'system', content: SECTION_SYSTEM_PROMPT },
+      { role: 'user', content: SECTION_EDIT_USER_PROMPT(plan, section, neighbors, instruction) }
+    ], { kind: 'section-edit', section, instruction }, options)
 
-    const json = completion.choices[0].message?.content
-    if (!json) throw new Error('Empty AI response')
-    
-    return JSON.parse(json) as SitePlan
+    return SiteSectionSchema.parse({ ...edited, id: section.id, type: section.type })
   } catch (error) {
-    console.error('AI generation error:', error)
-    throw new Error('Failed to generate site plan')
+    throw generationError(error)
   }
-}
\ No newline at end of file
+}
@@ -0,0 +1,97 @@
+import { GeneratedFiles } from './validation'
+import { LruCache } from './cache'
+import { hashValue } from './hash'
+import { globalSingleton } from './singleton'
+import { CompressionProfile, zipStream } from './zip'
+import { tarGzStream } from './tar'
+import { singleFileHtml } from './html-bundle'
+
+type Files = GeneratedFiles['files']
+
+export type ExportFormat = 'zip' | 'tar.gz' | 'html'
+
+interface FormatSpec {
+  contentType: string
+  extension: string
+  build(files: Files, profile: CompressionProfile, digests?: string[]): ReadableStream<Uint8Array>
+}
+
+const FORMATS: Record<ExportFormat, FormatSpec> = {
+  zip: { contentType: 'application/zip', extension: 'zip', build: zipStream },
+  'tar.gz': { contentType: 'application/gzip', extension: 'tar.gz', build: tarGzStream },
+  html: {
+    contentType: 'text/html; charset=utf-8',
+    extension: 'html',
+    build: files => {
+      const html = singleFileHtml(files)
+      if (html === undefined) throw new Error('Single-file HTML export needs a vanilla site')
+      return new Blob([html]).stream()
+    }
+  }
+}
+
+export function parseExportFormat(value: string | null | undefined): ExportFormat {
+  return value === 'tar.gz' || value === 'html' ? value : 'zip'
+}
+
+export function exportFormat(format: ExportFormat): Pick<FormatSpec, 'contentType' | 'extension'> {
+  const { contentType, extension } = FORMATS[format]
+  return { contentType, extension }
+}
+
+// Finished archives by file set, format and profile, so downloading the same site
+// again is served without compressing anything
+const archiveCache = globalSingleton('archives', () => new LruCache<Buffer>({
+  ttlMs: Number(process.env.ARCHIVE_CACHE_TTL_MS) || 60 * 60 * 1000,
+  maxEntries: Number(process.env.ARCHIVE_CACHE_MAX_ENTRIES) || 200,
+  maxBytes: Number(process.env.ARCHIVE_CACHE_MAX_BYTES) || 128 * 1024 * 1024
+}))
+
+// Larger archives are streamed without being copied aside for the cache
+const MAX_CACHED_ARCHIVE_BYTES = Number(process.env.ARCHIVE_CACHE_MAX_ARCHIVE_BYTES) || 16 * 1024 * 1024
+
+export interface Archive {
+  etag: string
+  body: Buffer | ReadableStream<Uint8Array>
+}
+
+// Weak, because an archive rebuilt after eviction holds the same files with
+// new timestamps. The project id already hashes the sorted (path, content
+// hash) pairs, so the order files are listed in does not matter, and nothing
+// is hashed again here.
+export function archiveETag(projectId: string, format: ExportFormat, profile: CompressionProfile): string {
+  return `W/"${hashValue({ project: projectId, profile, format })}"`
+}
+
+// digests are the files' content hashes when the caller has them already
+export function buildArchive(
+  files: Files,
+  format: ExportFormat,
+  profile: CompressionProfile,
+  etag: string,
+  digests?: string[]
+): Archive {
+  const cached = archiveCache.get(etag)
+  if (cached) return { etag, body: cached }
+
+  // Keep a copy of the chunks as they pass; the archive is cached only once
+  // the client has read it to the end
+  let chunks: Uint8Array[] | undefined = []
+  let bytes = 0
+
+  const body = FORMATS[format].build(files, profile, digests).pipeThrough(new TransformStream<Uint8Array, Uint8Array>({
+    transform(chunk, controller) {
+      if (chunks) {
+        bytes += chunk.length
+        if (bytes > MAX_CACHED_ARCHIVE_BYTES) chunks = undefined
+        else chunks.push(chunk)
+      }
+      controller.enqueue(chunk)
+    },
+    flush() {
+      if (chunks) archiveCache.set(etag, Buffer.concat(chunks), bytes)
+    }
+  }))
+
+  return { etag, body }
+}
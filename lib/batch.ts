@@ -0,0 +1,68 @@
+import { BuildRequest, GeneratedFiles, SitePlan } from './validation'
+import { GenerateOptions, generateSitePlan } from './ai'
+import { buildFilesFromPlan, sectionRevisions } from './codegen'
+import { mapWithConcurrency } from './concurrency'
+import { hashValue } from './hash'
+import { saveProject } from './projects'
+
+export type BatchEvent =
+  | { type: 'item'; index: number; plan: SitePlan; files: GeneratedFiles; projectId: string }
+  | { type: 'error'; index: number; error: string }
+
+// Generates every request, yielding each result as soon as it is ready. Requests
+// that differ only in framework share one plan and are only re-rendered. Once
+// options.signal aborts, no further requests start and the generator ends.
+export async function* generateBatch(
+  requests: BuildRequest[],
+  concurrency: number,
+  options: GenerateOptions = {}
+): AsyncGenerator<BatchEvent> {
+  const groups = new Map<string, number[]>()
+  requests.forEach((request, index) => {
+    const key = hashValue({ ...request, framework: undefined })
+    const members = groups.get(key)
+    if (members) members.push(index)
+    else groups.set(key, [index])
+  })
+
+  const ready: BatchEvent[] = []
+  let wake: (() => void) | undefined
+  const emit = (event: BatchEvent) => {
+    ready.push(event)
+    wake?.()
+  }
+
+  let finished = false
+  const { signal } = options
+  const work = mapWithConcurrency([...groups.values()], concurrency, async indexes => {
+    if (signal?.aborted) return
+    try {
+      const plan = await generateSitePlan(requests[indexes[0]], options)
+      const revisions = sectionRevisions(plan)
+      for (const index of indexes) {
+        const { framework } = requests[index]
+        const files = buildFilesFromPlan(plan, framework, revisions)
+        emit({ type: 'item', index, plan, files, projectId: await saveProject(files.files, { plan, framework, revisions }) })
+      }
+    } catch (error: any) {
+      if (signal?.aborted) return
+      for (const index of indexes) {
+        emit({ type: 'error', index, error: error.message || 'Failed to generate site' })
+      }
+    }
+  }).finally(() => {
+    finished = true
+    wake?.()
+  })
+
+  while ((!finished || ready.length > 0) && !signal?.aborted) {
+    if (ready.length === 0) {
+      await new Promise<void>(resolve => { wake = resolve })
+      wake = undefined
+      continue
+    }
+    yield ready.shift()!
+  }
+
+  await work
+}
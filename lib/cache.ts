@@ -0,0 +1,263 @@
+import { randomUUID } from 'crypto'
+import { promises as fs } from 'fs'
+import path from 'path'
+
+export interface CacheOptions {
+  maxEntries?: number
+  maxBytes?: number
+  ttlMs?: number
+}
+
+export interface CacheStats {
+  hits: number
+  misses: number
+  evictions: number
+  entries: number
+  bytes: number
+}
+
+interface CacheEntry<V> {
+  value: V
+  size: number
+  expiresAt: number
+}
+
+export class LruCache<V> {
+  private entries = new Map<string, CacheEntry<V>>()
+  private bytes = 0
+  private hits = 0
+  private misses = 0
+  private evictions = 0
+
+  constructor(private options: CacheOptions = {}) {}
+
+  get(key: string): V | undefined {
+    const entry = this.entries.get(key)
+
+    if (!entry || entry.expiresAt <= Date.now()) {
+      if (entry) this.remove(key, entry)
+      this.misses++
+      return undefined
+    }
+
+    // Map iteration order is insertion order, so re-inserting marks it most recent
+    this.entries.delete(key)
+    this.entries.set(key, entry)
+    this.hits++
+    return entry.value
+  }
+
+  peek(key: string): V | undefined {
+    const entry = this.entries.get(key)
+    return entry && entry.expiresAt > Date.now() ? entry.value : undefined
+  }
+
+  set(key: string, value: V, size = 1, ttlMs = this.options.ttlMs): void {
+    const existing = this.entries.get(key)
+    if (existing) this.remove(key, existing)
+
+    if (this.options.maxBytes && size > this.options.maxBytes) return
+
+    this.entries.set(key, {
+      value,
+      size,
+      expiresAt: ttlMs ? Date.now() + ttlMs : Infinity
+    })
+    this.bytes += size
+    this.evict()
+  }
+
+  delete(key: string): boolean {
+    const entry = this.entries.get(key)
+    if (!entry) return false
+    this.remove(key, entry)
+    return true
+  }
+
+  clear(): void {
+    this.entries.clear()
+    this.bytes = 0
+  }
+
+  get size(): number {
+    return this.entries.size
+  }
+
+  stats(): CacheStats {
+    return {
+      hits: this.hits,
+      misses: this.misses,
+      evictions: this.evictions,
+      entries: this.entries.size,
+      bytes: this.bytes
+    }
+  }
+
+  private remove(key: string, entry: CacheEntry<V>) {
+    this.entries.delete(key)
+    this.bytes -= entry.size
+  }
+
+  private evict() {
+    const { maxEntries, maxBytes } = this.options
+
+    while (
+      this.entries.size > 0 &&
+      ((maxEntries && this.entries.size > maxEntries) || (maxBytes && this.bytes > maxBytes))
+    ) {
+      const oldest = this.entries.keys().next().value as string
+      this.remove(oldest, this.entries.get(oldest)!)
+      this.evictions++
+    }
+  }
+}
+
+interface DiskRecord<V> {
+  expiresAt: number
+  value: V
+}
+
+// Stores one JSON file per key; pruning by mtime keeps the directory bounded
+export class DiskCache<V> {
+  private writesSincePrune = 0
+
+  constructor(private dir: string, private options: CacheOptions = {}) {}
+
+  async get(key: string): Promise<V | undefined> {
+    try {
+      const raw = await fs.readFile(this.file(key), 'utf8')
+      const record = JSON.parse(raw) as DiskRecord<V>
+
+      if (record.expiresAt <= Date.now()) {
+        await fs.rm(this.file(key), { force: true })
+        return undefined
+      }
+
+      return record.value
+    } catch {
+      return undefined
+    }
+  }
+
+  async set(key: string, value: V, serialized = JSON.stringify(value)): Promise<void> {
+    const { ttlMs } = this.options
+    const expiresAt = ttlMs ? Date.now() + ttlMs : Number.MAX_SAFE_INTEGER
+    const target = this.file(key)
+    // Unique per write, so concurrent writes of one key never share a temp file
+    const temp = `${target}.${process.pid}.${randomUUID()}.tmp`
+
+    try {
+      await fs.mkdir(this.dir, { recursive: true })
+      await fs.writeFile(temp, `{"expiresAt":${expiresAt},"value":${serialized}}`)
+      await fs.rename(temp, target)
+
+      if (++this.writesSincePrune >= 20) {
+        this.writesSincePrune = 0
+        await this.prune()
+      }
+    } catch (error) {
+      console.warn('Disk cache write failed:', error)
+    }
+  }
+
+  async prune(): Promise<void> {
+    const { maxEntries, maxBytes } = this.options
+    const names = (await fs.readdir(this.dir)).filter(name => name.endsWith('.json'))
+    const files = await Promise.all(names.map(async name => {
+      const stat = await fs.stat(path.join(this.dir, name))
+      return { name, size: stat.size, mtime: stat.mtimeMs }
+    }))
+
+    files.sort((a, b) => b.mtime - a.mtime)
+
+    let bytes = 0
+    for (let i = 0; i < files.length; i++) {
+      bytes += files[i].size
+      if ((maxEntries && i >= maxEntries) || (maxBytes && bytes > maxBytes)) {
+        await fs.rm(path.join(this.dir, files[i].name), { force: true })
+      }
+    }
+  }
+
+  private file(key: string) {
+    return path.join(this.dir, `${key}.json`)
+  }
+}
+
+export interface TieredCacheOptions extends CacheOptions {
+  dir?: string
+  maxDiskEntries?: number
+  maxDiskBytes?: number
+}
+
+export interface TieredCacheStats extends CacheStats {
+  memoryHits: number
+  diskHits: number
+}
+
+// Cached values are shared by every caller that reads them, so the memory
+// tier keeps its own frozen copy rather than the caller's object
+function deepFreeze<T>(value: T): T {
+  if (value && typeof value === 'object' && !Object.isFrozen(value)) {
+    Object.freeze(value)
+    for (const child of Object.values(value)) deepFreeze(child)
+  }
+  return value
+}
+
+// In-memory LRU in front of an optional on-disk tier. Values are returned
+// frozen: callers that need to change one must copy it first.
+export class TieredCache<V> {
+  private memory: LruCache<V>
+  private disk?: DiskCache<V>
+  private memoryHits = 0
+  private diskHits = 0
+  private misses = 0
+
+  constructor(options: TieredCacheOptions = {}) {
+    this.memory = new LruCache<V>(options)
+
+    if (options.dir) {
+      this.disk = new DiskCache<V>(options.dir, {
+        ttlMs: options.ttlMs,
+        maxEntries: options.maxDiskEntries,
+        maxBytes: options.maxDiskBytes
+      })
+    }
+  }
+
+  async get(key: string): Promise<V | undefined> {
+    const cached = this.memory.get(key)
+    if (cached !== undefined) {
+      this.memoryHits++
+      return cached
+    }
+
+    const stored = await this.disk?.get(key)
+    if (stored !== undefined) {
+      this.diskHits++
+      this.memory.set(key, deepFreeze(stored), JSON.stringify(stored).length)
+      return stored
+    }
+
+    this.misses++
+    return undefined
+  }
+
+  async set(key: string, value: V): Promise<void> {
+    const serialized = JSON.stringify(value)
+    this.memory.set(key, deepFreeze(JSON.parse(serialized)), serialized.length)
+    await this.disk?.set(key, value, serialized)
+  }
+
+  stats(): TieredCacheStats {
+    const memory = this.memory.stats()
+    return {
+      ...memory,
+      hits: this.memoryHits + this.diskHits,
+      misses: this.misses,
+      memoryHits: this.memoryHits,
+      diskHits: this.diskHits
+    }
+  }
+}
@@ -1,43 +1,196 @@
 import { SitePlan, GeneratedFiles, BuildRequest } from './validation'
+import { randomUUID } from 'crypto'
+import { LruCache } from './cache'
+import { globalSingleton } from './singleton'
+import { Renderer, TemplateRegistry, each, json, jsx, prop, sectionId, sectionType, template, value, when } from './templates'
 
-function renderHtml(plan: SitePlan): string {
-  const isRTL = plan.meta.language === 'fa'
-  const sections = plan.sections.map(section => {
-    switch(section.type) {
-      case 'hero':
-        return `
-    <section id="${section.id}" class="hero">
-      <h1>${section.props.title || 'Welcome'}</h1>
-      <p>${section.props.subtitle || ''}</p>
-      ${section.props.cta ? `<button class="cta-button">${section.props.cta}</button>` : ''}
-    </section>`
-      case 'features':
-        return `
-    <section id="${section.id}" class="features">
-      <h2>${section.props.title || 'Features'}</h2>
+type Section = SitePlan['sections'][number]
+
+// Section templates are compiled once at module load into renderers that
+// concatenate static chunks with prop lookups; no per-call switch or nesting
+
+const htmlSections = new TemplateRegistry(template`
+    <section id="${sectionId}" class="${sectionType}">
+      <pre>${json(undefined, 2)}</pre>
+    </section>`)
+  .register('hero', template`
+    <section id="${sectionId}" class="hero">
+      <h1>${prop('title', 'Welcome')}</h1>
+      <p>${prop('subtitle', '')}</p>
+      ${when('cta', template`<button class="cta-button">${prop('cta')}</button>`)}
+    </section>`)
+  .register('features', template`
+    <section id="${sectionId}" class="features">
+      <h2>${prop('title', 'Features')}</h2>
       <div class="features-grid">
-        ${(section.props.items || []).map((item: any) => `
+        ${each('items', template`
         <div class="feature-item">
-          <h3>${item.title}</h3>
-          <p>${item.description}</p>
-        </div>`).join('')}
+          <h3>${prop('title')}</h3>
+          <p>${prop('description')}</p>
+        </div>`)}
       </div>
-    </section>`
-      case 'contact':
-        return `
-    <section id="${section.id}" class="contact">
-      <h2>${section.props.title || 'Contact'}</h2>
-      <p>${section.props.email || ''}</p>
-      <p>${section.props.phone || ''}</p>
-      <p>${section.props.address || ''}</p>
-    </section>`
-      default:
-        return `
-    <section id="${section.id}" class="${section.type}">
-      <pre>${JSON.stringify(section.props, null, 2)}</pre>
-    </section>`
-    }
-  }).join('\n')
+    </section>`)
+  .register('menu', template`
+    <section id="${sectionId}" class="menu">
+      <h2>${prop('title', 'Menu')}</h2>
+      <ul class="menu-list">
+        ${each(['items', 'dishes'], template`
+        <li class="menu-item">
+          <div class="menu-item-header">
+            <h3>${prop(['name', 'title'], '')}</h3>
+            <span class="menu-price">${prop('price', '')}</span>
+          </div>
+          <p>${prop('description', '')}</p>
+        </li>`)}
+      </ul>
+    </section>`)
+  .register('gallery', template`
+    <section id="${sectionId}" class="gallery">
+      <h2>${prop('title', 'Gallery')}</h2>
+      <div class="gallery-grid">
+        ${each(['images', 'items'], template`
+        <figure class="gallery-item">
+          <img src="${prop(['url', 'src'], '')}" alt="${prop(['alt', 'caption', 'title'], '')}" loading="lazy">
+          ${when('caption', template`<figcaption>${prop('caption')}</figcaption>`)}
+        </figure>`)}
+      </div>
+    </section>`)
+  .register('pricing', template`
+    <section id="${sectionId}" class="pricing">
+      <h2>${prop('title', 'Pricing')}</h2>
+      <div class="pricing-grid">
+        ${each(['plans', 'tiers', 'items'], template`
+        <div class="pricing-plan">
+          <h3>${prop(['name', 'title'], '')}</h3>
+          <p class="pricing-price">${prop('price', '')}</p>
+          <ul>
+            ${each('features', template`<li>${value}</li>`)}
+          </ul>
+          ${when('cta', template`<button class="cta-button">${prop('cta')}</button>`)}
+        </div>`)}
+      </div>
+    </section>`)
+  .register('faq', template`
+    <section id="${sectionId}" class="faq">
+      <h2>${prop('title', 'FAQ')}</h2>
+      ${each(['items', 'questions'], template`
+      <details class="faq-item">
+        <summary>${prop(['question', 'q'], '')}</summary>
+        <p>${prop(['answer', 'a'], '')}</p>
+      </details>`)}
+    </section>`)
+  .register('contact', template`
+    <section id="${sectionId}" class="contact">
+      <h2>${prop('title', 'Contact')}</h2>
+      <p>${prop('email', '')}</p>
+      <p>${prop('phone', '')}</p>
+      <p>${prop('address', '')}</p>
+    </section>`)
+
+// React and Next sections are JSX elements; prop text goes in as string
+// literals and lists as arrays mapped to elements, never as raw children
+const reactSections = new TemplateRegistry(() => '')
+  .register('hero', template`
+      <section id="${sectionId}" className="hero">
+        <h1>${jsx(prop('title', 'Welcome'))}</h1>
+        <p>${jsx(prop('subtitle', ''))}</p>
+        ${when('cta', template`<button className="cta-button">${jsx(prop('cta'))}</button>`)}
+      </section>`)
+  .register('features', template`
+      <section id="${sectionId}" className="features">
+        <h2>${jsx(prop('title', 'Features'))}</h2>
+        <div className="features-grid">
+          {${json('items')}.map((item, index) => (
+            <div key={index} className="feature-item">
+              <h3>{item.title}</h3>
+              <p>{item.description}</p>
+            </div>
+          ))}
+        </div>
+      </section>`)
+
+const titleOrType: Renderer = (props, section) => `${props.title || section.type}`
+
+const nextSections = new TemplateRegistry(template`
+        <section className="mb-12">
+          <h2 className="text-2xl font-semibold mb-4">${jsx(titleOrType)}</h2>
+          <pre className="bg-gray-100 p-4 rounded">${jsx(json(undefined, 2))}</pre>
+        </section>`)
+
+const registries = {
+  vanilla: htmlSections,
+  react: reactSections,
+  next: nextSections
+}
+
+// Lets new section types (or overrides) plug into codegen for one framework
+export function registerSectionTemplate(
+  framework: BuildRequest['framework'],
+  type: string,
+  renderer: Renderer
+): void {
+  registries[framework].register(type, renderer)
+  // Fragments rendered by the replaced template are stale
+  fragmentCache.clear()
+}
+
+// Rendered fragments keyed by framework and section revision. A revision
+// names one version of a section: it is minted when the section is generated
+// and kept while the section is unchanged, so re-rendering a plan after a
+// one-section edit only renders that section, without hashing any of them.
+const fragmentCache = globalSingleton('sectionFragments', () => new LruCache<string>({
+  maxEntries: Number(process.env.FRAGMENT_CACHE_MAX_ENTRIES) || 5000,
+  maxBytes: Number(process.env.FRAGMENT_CACHE_MAX_BYTES) || 32 * 1024 * 1024
+}))
+
+export function newRevision(): string {
+  return randomUUID()
+}
+
+// Revisions for a freshly generated plan, one per section
+export function sectionRevisions(plan: SitePlan): string[] {
+  return plan.sections.map(() => newRevision())
+}
+
+export function getFragmentCacheStats() {
+  return fragmentCache.stats()
+}
+
+function renderFragment(section: Section, framework: BuildRequest['framework'], revision?: string): string {
+  // Without a revision there is nothing to key on, so it is rendered afresh
+  if (revision === undefined) return registries[framework].render(section)
+
+  const key = `${framework}:${revision}`
+  let markup = fragmentCache.get(key)
+
+  if (markup === undefined) {
+    markup = registries[framework].render(section)
+    fragmentCache.set(key, markup, markup.length)
+  }
+
+  return markup
+}
+
+// Sections in order, with separator between the non-empty ones
+function renderSections(
+  plan: SitePlan,
+  framework: BuildRequest['framework'],
+  separator: string,
+  revisions?: string[]
+): string {
+  let out = ''
+
+  for (let i = 0; i < plan.sections.length; i++) {
+    const markup = renderFragment(plan.sections[i], framework, revisions?.[i])
+    if (markup) out = out ? out + separator + markup : markup
+  }
+
+  return out
+}
+
+function renderHtml(plan: SitePlan, revisions?: string[]): string {
+  const isRTL = plan.meta.language === 'fa'
+  const sections = renderSections(plan, 'vanilla', '\n', revisions)
 
   return `<!DOCTYPE html>
 <html lang="${plan.meta.language}" ${isRTL ? 'dir="rtl"' : ''}>
@@ -126,6 +279,69 @@ section {
   background: ${colors.secondary || '#f8f9fa'};
   padding: 40px;
   border-radius: 8px;
+}
+
+.menu-list {
+  list-style: none;
+  margin-top: 30px;
+}
+
+.menu-item {
+  padding: 15px 0;
+  border-bottom: 1px solid ${colors.secondary || '#f8f9fa'};
+}
+
+.menu-item-header {
+  display: flex;
+  justify-content: space-between;
+  gap: 20px;
+}
+
+.menu-price,
+.pricing-price {
+  font-weight: bold;
+  color: ${colors.primary || '#007bff'};
+}
+
+.gallery-grid,
+.pricing-grid {
+  display: grid;
+  grid-template-columns: repeat(auto-fit, minmax(250px, 1fr));
+  gap: 30px;
+  margin-top: 30px;
+}
+
+.gallery-item img {
+  width: 100%;
+  height: auto;
+  display: block;
+  border-radius: 8px;
+}
+
+.pricing-plan {
+  padding: 30px 20px;
+  background: ${colors.secondary || '#f8f9fa'};
+  border-radius: 8px;
+  text-align: center;
+}
+
+.pricing-plan ul {
+  list-style: none;
+  margin: 20px 0;
+}
+
+.pricing-price {
+  font-size: 1.8em;
+}
+
+.faq-item {
+  padding: 15px 0;
+  border-bottom: 1px solid ${colors.secondary || '#f8f9fa'};
+}
+
+.faq-item summary {
+  cursor: pointer;
+  font-weight: bold;
 }`
 }
 
@@ -147,43 +363,16 @@ document.addEventListener('DOMContentLoaded', function() {
 });`
 }
 
-function renderReactApp(plan: SitePlan): string {
-  const sections = plan.sections.map(section => {
-    switch(section.type) {
-      case 'hero':
-        return `
-  const Hero = () => (
-    <section className="hero">
-      <h1>${section.props.title || 'Welcome'}</h1>
-      <p>${section.props.subtitle || ''}</p>
-      ${section.props.cta ? `<button className="cta-button">${section.props.cta}</button>` : ''}
-    </section>
-  );`
-      case 'features':
-        return `
-  const Features = () => (
-    <section className="features">
-      <h2>${section.props.title || 'Features'}</h2>
-      <div className="features-grid">
-        ${JSON.stringify(section.props.items || [])}
-      </div>
-    </section>
-  );`
-      default:
-        return ''
-    }
-  }).filter(Boolean).join('\n')
+function renderReactApp(plan: SitePlan, revisions?: string[]): string {
+  const sections = renderSections(plan, 'react', '\n', revisions)
 
   return `import React from 'react';
 import './App.css';
 
 function App() {
-  ${sections}
-
   return (
     <div className="App">
-      <Hero />
-      <Features />
+${sections}
     </div>
   );
 }
@@ -191,18 +380,14 @@ function App() {
 export default App;`
 }
 
-function renderNextPage(plan: SitePlan): string {
+function renderNextPage(plan: SitePlan, revisions?: string[]): string {
   return `export default function Home() {
   return (
     <main className="flex min-h-screen flex-col items-center justify-between p-24">
       <div className="z-10 w-full max-w-5xl items-center justify-between font-mono text-sm">
-        <h1 className="text-4xl font-bold mb-8">${plan.meta.title}</h1>
-        <p className="text-xl mb-8">${plan.meta.description}</p>
-        ${plan.sections.map(section => `
-        <section className="mb-12">
-          <h2 className="text-2xl font-semibold mb-4">${section.props.title || section.type}</h2>
-          <pre className="bg-gray-100 p-4 rounded">${JSON.stringify(section.props, null, 2)}</pre>
-        </section>`).join('')}
+        <h1 className="text-4xl font-bold mb-8">{${JSON.stringify(plan.meta.title)}}</h1>
+        <p className="text-xl mb-8">{${JSON.stringify(plan.meta.description)}}</p>
+        ${renderSections(plan, 'next', '', revisions)}
       </div>
     </main>
   );
@@ -214,8 +399,8 @@ function baseLayout(plan: SitePlan): string {
 import './globals.css'
 
 export const metadata: Metadata = {
-  title: '${plan.meta.title}',
-  description: '${plan.meta.description}',
+  title: ${JSON.stringify(plan.meta.title)},
+  description: ${JSON.stringify(plan.meta.description)},
 }
 
 export default function RootLayout({
@@ -290,9 +475,25 @@ function basicPkgJson(framework: string): string {
   }, null, 2)
 }
 
-export function buildFilesFromPlan(plan: SitePlan, framework: BuildRequest['framework']): GeneratedFiles {
+// Markup for a single section, used to stream partial results before the plan
+// is complete. It goes through the fragment cache, so the final build reuses it.
+export function renderSectionFragment(
+  section: Section,
+  framework: BuildRequest['framework'],
+  revision?: string
+): string {
+  return renderFragment(section, framework, revision)
+}
+
+// revisions[i] names the version of plan.sections[i]; sections with one are
+// served from the fragment cache
+export function buildFilesFromPlan(
+  plan: SitePlan,
+  framework: BuildRequest['framework'],
+  revisions?: string[]
+): GeneratedFiles {
   if (framework === 'vanilla') {
-    const html = renderHtml(plan)
+    const html = renderHtml(plan, revisions)
     const css = renderCss(plan)
     const js = renderJs(plan)
     return { 
@@ -309,7 +510,7 @@ export function buildFilesFromPlan(plan: SitePlan, framework: BuildRequest['fram
     return { 
       files: [
         { path: 'package.json', content: pkg },
-        { path: 'src/App.jsx', content: renderReactApp(plan) },
+        { path: 'src/App.jsx', content: renderReactApp(plan, revisions) },
         { path: 'src/main.jsx', content: `import React from 'react';
 import { createRoot } from 'react-dom/client';
 import App from './App';
@@ -335,7 +536,7 @@ createRoot(document.getElementById('root')).render(<App/>);` },
   return { 
     files: [
       { path: 'package.json', content: pkg },
-      { path: 'app/page.tsx', content: renderNextPage(plan) },
+      { path: 'app/page.tsx', content: renderNextPage(plan, revisions) },
       { path: 'app/layout.tsx', content: baseLayout(plan) },
       { path: 'app/globals.css', content: tailwindBase() },
       { path: 'tailwind.config.ts', content: tailwindConfig(plan) },
@@ -0,0 +1,170 @@
+import { Worker } from 'worker_threads'
+import { availableParallelism } from 'os'
+import { globalSingleton } from './singleton'
+
+export interface CompressedEntry {
+  // Raw DEFLATE data, without zlib or gzip framing, or the input itself when stored
+  body: Buffer
+  stored: boolean
+  crc: number
+  size: number
+}
+
+interface Task {
+  message: { content: string; level: number } | { digest: string[] }
+  resolve: (result: any) => void
+  reject: (error: Error) => void
+}
+
+// Inline source, so the worker does not depend on how the app is bundled.
+// It encodes, checksums and deflates one entry per message and transfers the
+// output back instead of copying it, or hashes a list of file contents.
+// Level 0 means store without trying; otherwise entries whose leading bytes
+// look random (close to 8 bits of entropy per byte) or that would not shrink
+// are stored as well.
+const WORKER_SOURCE = `
+const { parentPort } = require('worker_threads')
+const { deflateRawSync } = require('zlib')
+const { createHash } = require('crypto')
+
+const table = new Uint32Array(256)
+for (let n = 0; n < 256; n++) {
+  let c = n
+  for (let k = 0; k < 8; k++) c = c & 1 ? 0xedb88320 ^ (c >>> 1) : c >>> 1
+  table[n] = c >>> 0
+}
+
+const SAMPLE_BYTES = 4096
+const STORE_ENTROPY_BITS = 7.5
+
+function sampleEntropy(data) {
+  const length = Math.min(data.length, SAMPLE_BYTES)
+  const counts = new Uint32Array(256)
+  for (let i = 0; i < length; i++) counts[data[i]]++
+
+  let bits = 0
+  for (let i = 0; i < 256; i++) {
+    if (counts[i]) {
+      const p = counts[i] / length
+      bits -= p * Math.log2(p)
+    }
+  }
+  return bits
+}
+
+parentPort.on('message', ({ content, level, digest }) => {
+  try {
+    if (digest) {
+      parentPort.postMessage({ digests: digest.map(text => createHash('sha256').update(text).digest('hex')) })
+      return
+    }
+
+    const data = Buffer.from(content, 'utf8')
+    let crc = 0xffffffff
+    for (let i = 0; i < data.length; i++) crc = table[(crc ^ data[i]) & 0xff] ^ (crc >>> 8)
+
+    let output = data
+    if (level > 0 && sampleEntropy(data) < STORE_ENTROPY_BITS) {
+      const compressed = deflateRawSync(data, { level })
+      if (compressed.length < data.length) output = compressed
+    }
+    const stored = output === data
+
+    // Copy out of any shared slab so the transfer detaches nothing else
+    const body = new Uint8Array(output.length)
+    body.set(output)
+    parentPort.postMessage({ body, stored, crc: (crc ^ 0xffffffff) >>> 0, size: data.length }, [body.buffer])
+  } catch (error) {
+    parentPort.postMessage({ error: error.message || 'Compression failed' })
+  }
+})
+`
+
+// Fixed set of worker threads, each compressing one entry (or hashing one file
+// set) at a time, so big exports use spare cores and leave the event loop free
+// for other requests
+export class CompressionPool {
+  private idle: Worker[] = []
+  private busy = new Map<Worker, Task>()
+  private queue: Task[] = []
+  private spawned = 0
+
+  constructor(readonly size: number) {}
+
+  async compress(content: string, level: number): Promise<CompressedEntry> {
+    const { body, stored, crc, size } = await this.run({ content, level })
+    return { body: Buffer.from(body.buffer), stored, crc, size }
+  }
+
+  // sha256 hex digest of each content, in order
+  async digest(contents: string[]): Promise<string[]> {
+    return (await this.run({ digest: contents })).digests
+  }
+
+  stats() {
+    return { workers: this.spawned, busy: this.busy.size, queued: this.queue.length }
+  }
+
+  private run(message: Task['message']): Promise<any> {
+    return new Promise((resolve, reject) => {
+      this.queue.push({ message, resolve, reject })
+      this.drain()
+    })
+  }
+
+  private drain() {
+    while (this.queue.length > 0) {
+      const worker = this.idle.pop() ?? (this.spawned < this.size ? this.spawn() : undefined)
+      if (!worker) return
+
+      const task = this.queue.shift()!
+      this.busy.set(worker, task)
+      worker.ref()
+      worker.postMessage(task.message)
+    }
+  }
+
+  // Workers start on first use and only hold the process open while busy
+  private spawn(): Worker {
+    const worker = new Worker(WORKER_SOURCE, { eval: true })
+    this.spawned++
+
+    worker.on('message', message => {
+      const task = this.busy.get(worker)
+      this.busy.delete(worker)
+      this.idle.push(worker)
+      worker.unref()
+
+      if (task) {
+        if (message.error) task.reject(new Error(message.error))
+        else task.resolve(message)
+      }
+      this.drain()
+    })
+
+    // A crashed worker fails its entry and is replaced on the next drain
+    worker.on('error', error => {
+      this.busy.get(worker)?.reject(error)
+      this.retire(worker)
+    })
+    worker.on('exit', () => {
+      this.busy.get(worker)?.reject(new Error('Compression worker exited'))
+      this.retire(worker)
+    })
+
+    // After the listeners, which would otherwise ref the worker again
+    worker.unref()
+    return worker
+  }
+
+  private retire(worker: Worker) {
+    if (!this.busy.delete(worker) && !this.idle.includes(worker)) return
+    this.idle = this.idle.filter(w => w !== worker)
+    this.spawned--
+    this.drain()
+  }
+}
+
+export const compressionPool = globalSingleton('compressionPool', () => new CompressionPool(
+  Number(process.env.COMPRESSION_WORKERS) || Math.max(1, Math.min(4, availableParallelism() - 1))
+))
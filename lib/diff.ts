@@ -0,0 +1,180 @@
+import { GeneratedFiles } from './validation'
+
+// Shared by routes and the browser: no Node-only imports here
+
+export type JsonPatchOp =
+  | { op: 'add'; path: string; value: unknown }
+  | { op: 'remove'; path: string }
+  | { op: 'replace'; path: string; value: unknown }
+
+// RFC 6901 pointer segment
+function escapePointer(key: string) {
+  return key.replace(/~/g, '~0').replace(/\//g, '~1')
+}
+
+function unescapePointer(segment: string) {
+  return segment.replace(/~1/g, '/').replace(/~0/g, '~')
+}
+
+function isObject(value: unknown): value is Record<string, unknown> {
+  return value !== null && typeof value === 'object' && !Array.isArray(value)
+}
+
+// RFC 6902 operations turning `from` into `to`. Arrays are compared by index,
+// which fits plan edits: sections are rewritten in place, appended or dropped.
+export function diffJson(from: unknown, to: unknown, path = ''): JsonPatchOp[] {
+  if (from === to) return []
+
+  if (Array.isArray(from) && Array.isArray(to)) {
+    const ops: JsonPatchOp[] = []
+    const common = Math.min(from.length, to.length)
+    for (let i = 0; i < common; i++) ops.push(...diffJson(from[i], to[i], `${path}/${i}`))
+    for (let i = common; i < to.length; i++) ops.push({ op: 'add', path: `${path}/-`, value: to[i] })
+    // Remove from the end so earlier indexes stay valid
+    for (let i = from.length - 1; i >= common; i--) ops.push({ op: 'remove', path: `${path}/${i}` })
+    return ops
+  }
+
+  if (isObject(from) && isObject(to)) {
+    const ops: JsonPatchOp[] = []
+    for (const key of Object.keys(from)) {
+      const child = `${path}/${escapePointer(key)}`
+      if (!(key in to)) ops.push({ op: 'remove', path: child })
+      else ops.push(...diffJson(from[key], to[key], child))
+    }
+    for (const key of Object.keys(to)) {
+      if (!(key in from)) ops.push({ op: 'add', path: `${path}/${escapePointer(key)}`, value: to[key] })
+    }
+    return ops
+  }
+
+  return [{ op: 'replace', path, value: to }]
+}
+
+// Applies ops without mutating doc; untouched branches are shared with it
+export function applyJsonPatch<T>(doc: T, ops: JsonPatchOp[]): T {
+  let result: unknown = doc
+
+  for (const op of ops) {
+    if (op.path === '') {
+      if (op.op === 'remove') throw new Error('Cannot remove the document root')
+      result = op.value
+      continue
+    }
+    result = applyAt(result, op.path.slice(1).split('/').map(unescapePointer), op)
+  }
+
+  return result as T
+}
+
+function applyAt(node: unknown, segments: string[], op: JsonPatchOp): unknown {
+  const [head, ...rest] = segments
+
+  // Only add may create a member; replace, remove and deeper paths need one
+  const creates = !rest.length && op.op === 'add'
+
+  if (Array.isArray(node)) {
+    const copy = node.slice()
+    const index = head === '-' ? copy.length : Number(head)
+    if (!Number.isInteger(index) || index < 0 || index > (creates ? copy.length : copy.length - 1)) {
+      throw new Error(`Patch path does not exist at "${head}"`)
+    }
+
+    if (rest.length) copy[index] = applyAt(copy[index], rest, op)
+    else if (op.op === 'add') copy.splice(index, 0, op.value)
+    else if (op.op === 'remove') copy.splice(index, 1)
+    else copy[index] = op.value
+    return copy
+  }
+
+  if (isObject(node)) {
+    if (!creates && !Object.prototype.hasOwnProperty.call(node, head)) {
+      throw new Error(`Patch path does not exist at "${head}"`)
+    }
+    const copy: Record<string, unknown> = { ...node }
+    if (rest.length) copy[head] = applyAt(copy[head], rest, op)
+    else if (op.op === 'remove') delete copy[head]
+    else copy[head] = op.value
+    return copy
+  }
+
+  throw new Error(`Patch path does not exist at "${head}"`)
+}
+
+// Replaces lines [start, start + deleteCount) of the old text with `lines`
+export interface LineHunk {
+  start: number
+  deleteCount: number
+  lines: string[]
+}
+
+// One hunk between the common leading and trailing lines. Section edits
+// change a contiguous block of each file, so this stays close to minimal.
+export function diffLines(from: string, to: string): LineHunk[] {
+  if (from === to) return []
+
+  const a = from.split('\n')
+  const b = to.split('\n')
+  let prefix = 0
+  while (prefix < a.length && prefix < b.length && a[prefix] === b[prefix]) prefix++
+
+  let suffix = 0
+  while (
+    suffix < a.length - prefix &&
+    suffix < b.length - prefix &&
+    a[a.length - 1 - suffix] === b[b.length - 1 - suffix]
+  ) suffix++
+
+  return [{
+    start: prefix,
+    deleteCount: a.length - prefix - suffix,
+    lines: b.slice(prefix, b.length - suffix)
+  }]
+}
+
+export function applyLineHunks(text: string, hunks: LineHunk[]): string {
+  if (!hunks.length) return text
+
+  const lines = text.split('\n')
+  // Later hunks first, so earlier line numbers are unaffected
+  for (const hunk of [...hunks].sort((x, y) => y.start - x.start)) {
+    lines.splice(hunk.start, hunk.deleteCount, ...hunk.lines)
+  }
+  return lines.join('\n')
+}
+
+export interface FilesDelta {
+  changed: Array<{ path: string; hunks: LineHunk[] }>
+  added: GeneratedFiles['files']
+  removed: string[]
+}
+
+export function diffFiles(from: GeneratedFiles['files'], to: GeneratedFiles['files']): FilesDelta {
+  const previous = new Map(from.map(file => [file.path, file.content]))
+  const next = new Set(to.map(file => file.path))
+  const delta: FilesDelta = { changed: [], added: [], removed: [] }
+
+  for (const file of to) {
+    const old = previous.get(file.path)
+    if (old === undefined) delta.added.push(file)
+    else if (old !== file.content) delta.changed.push({ path: file.path, hunks: diffLines(old, file.content) })
+  }
+  for (const file of from) {
+    if (!next.has(file.path)) delta.removed.push(file.path)
+  }
+
+  return delta
+}
+
+export function applyFilesDelta(files: GeneratedFiles['files'], delta: FilesDelta): GeneratedFiles['files'] {
+  const changed = new Map(delta.changed.map(change => [change.path, change.hunks]))
+  const removed = new Set(delta.removed)
+
+  return files
+    .filter(file => !removed.has(file.path))
+    .map(file => {
+      const hunks = changed.get(file.path)
+      return hunks ? { path: file.path, content: applyLineHunks(file.content, hunks) } : file
+    })
+    .concat(delta.added)
+}
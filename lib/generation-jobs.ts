@@ -0,0 +1,50 @@
+import { BuildRequest, GeneratedFiles, SitePlan } from './validation'
+import { GenerateOptions, generateSitePlan } from './ai'
+import { buildFilesFromPlan, sectionRevisions } from './codegen'
+import { Job, JobQueue } from './jobs'
+import { globalSingleton } from './singleton'
+import { saveProject } from './projects'
+
+export interface GenerationJobInput {
+  request: BuildRequest
+  options: GenerateOptions
+}
+
+export interface GenerationResult {
+  plan: SitePlan
+  files: GeneratedFiles
+  projectId: string
+}
+
+export type GenerationJob = Job<GenerationJobInput, GenerationResult>
+
+export const generationJobs = globalSingleton('generationJobs', () =>
+  new JobQueue<GenerationJobInput, GenerationResult>(
+    async ({ request, options }) => {
+      const plan = await generateSitePlan(request, options)
+      const revisions = sectionRevisions(plan)
+      const files = buildFilesFromPlan(plan, request.framework, revisions)
+      const source = { plan, framework: request.framework, revisions }
+      return { plan, files, projectId: await saveProject(files.files, source) }
+    },
+    {
+      concurrency: Number(process.env.JOB_CONCURRENCY) || 4,
+      maxQueued: Number(process.env.JOB_MAX_QUEUED) || 200,
+      retentionMs: Number(process.env.JOB_RETENTION_MS) || 30 * 60 * 1000,
+      maxJobs: Number(process.env.JOB_MAX_RETAINED) || 1000
+    }
+  )
+)
+
+// Status payload without the request or result bodies
+export function jobStatus(job: GenerationJob) {
+  return {
+    id: job.id,
+    status: job.status,
+    createdAt: job.createdAt,
+    startedAt: job.startedAt,
+    finishedAt: job.finishedAt,
+    error: job.error,
+    errorStatus: job.errorStatus
+  }
+}
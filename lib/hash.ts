@@ -0,0 +1,28 @@
+import { createHash } from 'crypto'
+
+// JSON.stringify with object keys sorted, so equal values always hash equally
+export function stableStringify(value: unknown): string {
+  if (value === null || typeof value !== 'object') {
+    return JSON.stringify(value) ?? 'null'
+  }
+
+  if (Array.isArray(value)) {
+    return `[${value.map(item => stableStringify(item)).join(',')}]`
+  }
+
+  const record = value as Record<string, unknown>
+  const entries = Object.keys(record)
+    .filter(key => record[key] !== undefined)
+    .sort()
+    .map(key => `${JSON.stringify(key)}:${stableStringify(record[key])}`)
+
+  return `{${entries.join(',')}}`
+}
+
+export function sha256(input: string | Uint8Array): string {
+  return createHash('sha256').update(input).digest('hex')
+}
+
+export function hashValue(value: unknown): string {
+  return sha256(stableStringify(value))
+}
@@ -0,0 +1,39 @@
+import { GeneratedFiles } from './validation'
+
+type Files = GeneratedFiles['files']
+
+// Keeps inlined code from closing its own element early
+function escapeClosingTag(code: string, tag: 'style' | 'script') {
+  return code.replace(new RegExp(`</(${tag})`, 'gi'), '<\\/$1')
+}
+
+// Only vanilla sites are a page plus its stylesheet and script; React and
+// Next output needs a build step before it can run from one file
+export function canInlineHtml(files: Files): boolean {
+  return files.some(file => file.path === 'index.html')
+}
+
+// index.html with styles.css and main.js inlined where they are linked, the
+// way LivePreview renders it, so the page works opened straight from disk.
+// Assets that are not linked are appended, as LivePreview does.
+export function singleFileHtml(files: Files): string | undefined {
+  const byPath = new Map(files.map(file => [file.path, file.content]))
+  let html = byPath.get('index.html')
+  if (html === undefined) return undefined
+
+  const css = byPath.get('styles.css')
+  if (css !== undefined) {
+    const style = `<style>\n${escapeClosingTag(css, 'style')}\n</style>`
+    const link = /<link\b[^>]*href=["']\.?\/?styles\.css["'][^>]*>/i
+    html = link.test(html) ? html.replace(link, () => style) : html.replace('</head>', () => `${style}</head>`)
+  }
+
+  const js = byPath.get('main.js')
+  if (js !== undefined) {
+    const script = `<script>\n${escapeClosingTag(js, 'script')}\n</script>`
+    const tag = /<script\b[^>]*src=["']\.?\/?main\.js["'][^>]*>\s*<\/script>/i
+    html = tag.test(html) ? html.replace(tag, () => script) : html.replace('</body>', () => `${script}</body>`)
+  }
+
+  return html
+}
@@ -0,0 +1,29 @@
+import { NextRequest, NextResponse } from 'next/server'
+import { QueueFullError } from './scheduler'
+
+// Best-effort caller identity for per-client budgets
+export function clientKey(req: NextRequest): string {
+  return req.headers.get('x-forwarded-for')?.split(',')[0].trim()
+    || req.headers.get('x-real-ip')
+    || 'anonymous'
+}
+
+export function queueFullResponse(error: QueueFullError) {
+  return NextResponse.json(
+    { error: error.message },
+    {
+      status: 429,
+      headers: { 'Retry-After': String(Math.ceil(error.retryAfterMs / 1000)) }
+    }
+  )
+}
+
+// If-None-Match uses weak comparison, so W/ prefixes on either side are ignored
+export function etagMatches(req: NextRequest, etag: string): boolean {
+  const header = req.headers.get('if-none-match')
+  if (!header) return false
+  if (header.trim() === '*') return true
+
+  const bare = etag.replace(/^W\//, '')
+  return header.split(',').some(tag => tag.trim().replace(/^W\//, '') === bare)
+}
@@ -0,0 +1,117 @@
+import { randomUUID } from 'crypto'
+import { QueueFullError } from './scheduler'
+
+export type JobStatus = 'queued' | 'running' | 'succeeded' | 'failed'
+
+export interface Job<I, R> {
+  id: string
+  status: JobStatus
+  input: I
+  createdAt: number
+  startedAt?: number
+  finishedAt?: number
+  result?: R
+  error?: string
+  // For failed jobs, the status a synchronous request would have got
+  errorStatus?: number
+  // Set when the job was shed under load, as Retry-After is on a 429
+  retryAfterMs?: number
+}
+
+export interface JobQueueOptions {
+  concurrency: number
+  // Submissions beyond this many waiting jobs are rejected with QueueFullError
+  maxQueued: number
+  // Finished jobs are kept this long for clients to collect
+  retentionMs: number
+  // Oldest finished jobs are dropped first once this many are held
+  maxJobs: number
+}
+
+export interface JobQueueStats {
+  queued: number
+  running: number
+  retained: number
+}
+
+// In-process job runner: submit returns at once and a bounded number of
+// workers drain the queue in submission order
+export class JobQueue<I, R> {
+  private jobs = new Map<string, Job<I, R>>()
+  private pending: Job<I, R>[] = []
+  private running = 0
+
+  constructor(private handler: (input: I) => Promise<R>, private options: JobQueueOptions) {}
+
+  submit(input: I): Job<I, R> {
+    this.sweep()
+    if (this.pending.length >= this.options.maxQueued) throw new QueueFullError(1000)
+
+    const job: Job<I, R> = { id: randomUUID(), status: 'queued', input, createdAt: Date.now() }
+    this.jobs.set(job.id, job)
+    this.pending.push(job)
+    this.drain()
+    return job
+  }
+
+  get(id: string): Job<I, R> | undefined {
+    this.sweep()
+    return this.jobs.get(id)
+  }
+
+  stats(): JobQueueStats {
+    return {
+      queued: this.pending.length,
+      running: this.running,
+      retained: this.jobs.size - this.pending.length - this.running
+    }
+  }
+
+  private drain() {
+    while (this.running < this.options.concurrency && this.pending.length > 0) {
+      const job = this.pending.shift()!
+      this.running++
+      void this.execute(job)
+    }
+  }
+
+  private async execute(job: Job<I, R>) {
+    job.status = 'running'
+    job.startedAt = Date.now()
+
+    try {
+      job.result = await this.handler(job.input)
+      job.status = 'succeeded'
+    } catch (error: any) {
+      job.error = error.message || 'Job failed'
+      job.status = 'failed'
+      // Shed jobs are expected under load, not failures worth logging
+      if (error instanceof QueueFullError) {
+        job.errorStatus = 429
+        job.retryAfterMs = error.retryAfterMs
+      } else {
+        console.error(`Job ${job.id} failed:`, error)
+        job.errorStatus = error.name === 'TimeoutError' ? 504 : 500
+      }
+    } finally {
+      job.finishedAt = Date.now()
+      this.running--
+      this.drain()
+    }
+  }
+
+  // Drops expired results, then the oldest finished jobs above maxJobs. Map
+  // order is submission order, so the scan meets the oldest jobs first.
+  private sweep() {
+    const expiredBefore = Date.now() - this.options.retentionMs
+    let excess = this.jobs.size - this.options.maxJobs
+
+    for (const [id, job] of this.jobs) {
+      if (job.finishedAt === undefined) continue
+      if (job.finishedAt < expiredBefore || excess > 0) {
+        this.jobs.delete(id)
+        excess--
+      }
+    }
+  }
+}
@@ -0,0 +1,200 @@
+import { BuildRequest, SitePlan, SiteSection } from './validation'
+import { CompletionRequest, CompletionTask, ModelProvider } from './provider'
+import { hashValue } from './hash'
+import { sleep } from './concurrency'
+
+export interface LocalProviderOptions {
+  // Median time to the first byte; 0 answers immediately
+  latencyMs?: number
+  // Spread of the log-normal latency distribution around the median
+  latencySigma?: number
+  // Streamed responses are cut into chunks of this many characters...
+  chunkSize?: number
+  // ...spaced this far apart
+  chunkIntervalMs?: number
+}
+
+// Offline stand-in for the model. Answers are schema-valid and depend only on
+// the task, so identical requests get identical plans; only timing is random.
+export class LocalProvider implements ModelProvider {
+  readonly model = 'local-standin'
+
+  constructor(private options: LocalProviderOptions = {}) {}
+
+  async complete(request: CompletionRequest): Promise<string> {
+    await sleep(this.sampleLatency(), request.signal)
+    const json = JSON.stringify(answer(request.task))
+    request.onUsage?.(usage(request, json))
+    return json
+  }
+
+  async *stream(request: CompletionRequest): AsyncIterable<string> {
+    const { chunkSize = 64, chunkIntervalMs = 0 } = this.options
+    const json = JSON.stringify(answer(request.task))
+
+    await sleep(this.sampleLatency(), request.signal)
+    for (let i = 0; i < json.length; i += chunkSize) {
+      if (i > 0 && chunkIntervalMs) await sleep(chunkIntervalMs, request.signal)
+      yield json.slice(i, i + chunkSize)
+    }
+    request.onUsage?.(usage(request, json))
+  }
+
+  private sampleLatency() {
+    const { latencyMs = 0, latencySigma = 0 } = this.options
+    if (!latencyMs) return 0
+
+    // Box-Muller normal sample, exponentiated for a right-skewed tail
+    const normal = Math.sqrt(-2 * Math.log(1 - Math.random())) * Math.cos(2 * Math.PI * Math.random())
+    return Math.round(latencyMs * Math.exp(latencySigma * normal))
+  }
+}
+
+// About four characters per token, like the scheduler's own estimate
+function usage({ messages }: CompletionRequest, json: string): number {
+  const chars = messages.reduce((sum, message) => sum + message.content.length, 0) + json.length
+  return Math.ceil(chars / 4)
+}
+
+function answer(task: CompletionTask): unknown {
+  const pick = seededPicker(hashValue(task))
+
+  switch (task.kind) {
+    case 'plan':
+      return {
+        ...outline(task.request, pick),
+        sections: task.request.sections.map((type, index) => section(task.request, type, index, pick))
+      }
+    case 'outline':
+      return outline(task.request, pick)
+    case 'section':
+      return section(task.request, task.sectionType, task.index, pick)
+    case 'section-edit':
+      return {
+        ...task.section,
+        props: { ...task.section.props, subtitle: task.instruction.slice(0, 120) }
+      }
+  }
+}
+
+type Picker = <T>(options: readonly T[]) => T
+
+function outline(req: BuildRequest, pick: Picker): Omit<SitePlan, 'sections'> {
+  const name = brandName(req)
+  return {
+    meta: {
+      title: name,
+      description: req.intent.slice(0, 160),
+      language: req.language
+    },
+    assets: {
+      images: [{ id: 'hero', prompt: req.intent, url: 'https://via.placeholder.com/800x400' }]
+    },
+    style: {
+      colors: {
+        primary: req.theme.primary,
+        secondary: req.theme.secondary ?? pick(['#f8f9fa', '#eef2ff', '#fdf2f8']),
+        text: req.theme.dark ? '#f5f5f5' : '#333333',
+        background: req.theme.dark ? '#111111' : '#ffffff'
+      },
+      font: req.theme.font
+    }
+  }
+}
+
+function section(req: BuildRequest, type: string, index: number, pick: Picker): SiteSection {
+  const name = brandName(req)
+  const id = req.sections.indexOf(type as BuildRequest['sections'][number]) === index ? type : `${type}-${index + 1}`
+  const items = (count: number, make: (n: number) => Record<string, any>) =>
+    Array.from({ length: count }, (_, n) => make(n + 1))
+
+  switch (type) {
+    case 'hero':
+      return {
+        id,
+        type,
+        props: {
+          title: `${pick(['Welcome to', 'Discover', 'Meet'])} ${name}`,
+          subtitle: req.intent.slice(0, 120),
+          cta: pick(['Get started', 'Learn more', 'Contact us'])
+        }
+      }
+    case 'features':
+      return {
+        id,
+        type,
+        props: {
+          title: 'Features',
+          items: items(3, n => ({ title: `Feature ${n}`, description: `Why ${name} stands out, reason ${n}.` }))
+        }
+      }
+    case 'menu':
+      return {
+        id,
+        type,
+        props: {
+          title: 'Menu',
+          items: items(4, n => ({ name: `Item ${n}`, description: `House favourite ${n}.`, price: `$${4 + n * 3}` }))
+        }
+      }
+    case 'gallery':
+      return {
+        id,
+        type,
+        props: {
+          title: 'Gallery',
+          images: items(6, n => ({ url: 'https://via.placeholder.com/800x400', alt: `${name} photo ${n}` }))
+        }
+      }
+    case 'pricing':
+      return {
+        id,
+        type,
+        props: {
+          title: 'Pricing',
+          plans: items(3, n => ({
+            name: ['Basic', 'Pro', 'Business'][n - 1],
+            price: `$${n * 10}/mo`,
+            features: Array.from({ length: n + 1 }, (_, m) => `Benefit ${m + 1}`)
+          }))
+        }
+      }
+    case 'faq':
+      return {
+        id,
+        type,
+        props: {
+          title: 'FAQ',
+          items: items(4, n => ({ question: `Question ${n} about ${name}?`, answer: `Answer ${n}.` }))
+        }
+      }
+    case 'contact':
+    default:
+      return {
+        id,
+        type,
+        props: {
+          title: 'Contact',
+          email: `hello@${name.toLowerCase().replace(/[^a-z0-9]+/g, '') || 'example'}.com`,
+          phone: '+1 555 0100',
+          address: '123 Main Street'
+        }
+      }
+  }
+}
+
+function brandName(req: BuildRequest) {
+  return req.brand?.name || 'Our Site'
+}
+
+// Deterministic choices derived from a hex digest
+function seededPicker(seed: string): Picker {
+  let state = parseInt(seed.slice(0, 8), 16) || 1
+  return <T>(options: readonly T[]): T => {
+    // xorshift32
+    state ^= state << 13
+    state ^= state >>> 17
+    state ^= state << 5
+    return options[(state >>> 0) % options.length]
+  }
+}
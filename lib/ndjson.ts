@@ -0,0 +1,33 @@
+// Newline-delimited JSON helpers shared by streaming routes and their clients
+
+export function encodeNdjson(event: unknown): Uint8Array {
+  return new TextEncoder().encode(`${JSON.stringify(event)}\n`)
+}
+
+export async function* readNdjson<T = any>(body: ReadableStream<Uint8Array>): AsyncGenerator<T> {
+  const reader = body.getReader()
+  const decoder = new TextDecoder()
+  let buffer = ''
+
+  try {
+    while (true) {
+      const { done, value } = await reader.read()
+      if (done) break
+
+      buffer += decoder.decode(value, { stream: true })
+
+      let newline = buffer.indexOf('\n')
+      while (newline >= 0) {
+        const line = buffer.slice(0, newline).trim()
+        buffer = buffer.slice(newline + 1)
+        if (line) yield JSON.parse(line) as T
+        newline = buffer.indexOf('\n')
+      }
+    }
+
+    const rest = (buffer + decoder.decode()).trim()
+    if (rest) yield JSON.parse(rest) as T
+  } finally {
+    reader.releaseLock()
+  }
+}
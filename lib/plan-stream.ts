@@ -0,0 +1,159 @@
+import { ZodType } from 'zod'
+import {
+  SitePlan,
+  SiteSection,
+  SiteAssetsSchema,
+  SiteMetaSchema,
+  SiteSectionSchema,
+  SiteStyleSchema
+} from './validation'
+
+export type PlanStreamEvent =
+  | { type: 'meta'; meta: SitePlan['meta'] }
+  | { type: 'assets'; assets: SitePlan['assets'] }
+  | { type: 'section'; index: number; section: SiteSection }
+  | { type: 'style'; style: SitePlan['style'] }
+
+// Scans streamed SitePlan JSON once, emitting each top-level member and each
+// entry of `sections` as soon as its closing bracket arrives. Every piece is
+// validated against its SitePlanSchema sub-schema when it completes, and only
+// the unfinished tail of the input is buffered, so the document is never held
+// or parsed as a whole.
+export class PlanStreamParser {
+  private buffer = ''
+  private pos = 0
+  private depth = 0
+  private closed = false
+  private inString = false
+  private escaped = false
+  private expectKey = false
+  private keyStart = -1
+  private key = ''
+  private valueStart = -1
+  private sectionStart = -1
+  private meta?: SitePlan['meta']
+  private assets?: SitePlan['assets']
+  private style?: SitePlan['style']
+  private sections: SiteSection[] = []
+
+  push(chunk: string): PlanStreamEvent[] {
+    const events: PlanStreamEvent[] = []
+    this.buffer += chunk
+    const text = this.buffer
+
+    for (; this.pos < text.length; this.pos++) {
+      const ch = text[this.pos]
+
+      if (this.inString) {
+        if (this.escaped) {
+          this.escaped = false
+        } else if (ch === '\\') {
+          this.escaped = true
+        } else if (ch === '"') {
+          this.inString = false
+          if (this.keyStart >= 0) {
+            this.key = JSON.parse(text.slice(this.keyStart, this.pos + 1))
+            this.keyStart = -1
+          }
+        }
+        continue
+      }
+
+      switch (ch) {
+        case '"':
+          this.inString = true
+          if (this.depth === 1 && this.expectKey) {
+            this.keyStart = this.pos
+            this.expectKey = false
+          }
+          break
+        case '{':
+        case '[':
+          this.depth++
+          if (this.depth === 1) {
+            this.expectKey = true
+          } else if (this.depth === 2 && this.key !== 'sections') {
+            // Sections are parsed one by one below, never as a whole array
+            this.valueStart = this.pos
+          } else if (this.depth === 3 && ch === '{' && this.key === 'sections') {
+            this.sectionStart = this.pos
+          }
+          break
+        case '}':
+        case ']':
+          if (this.depth === 3 && this.sectionStart >= 0) {
+            const section = parsePiece('section', SiteSectionSchema, text.slice(this.sectionStart, this.pos + 1))
+            events.push({ type: 'section', index: this.sections.length, section })
+            this.sections.push(section)
+            this.sectionStart = -1
+          } else if (this.depth === 2 && this.valueStart >= 0) {
+            const event = this.memberEvent(text.slice(this.valueStart, this.pos + 1))
+            if (event) events.push(event)
+            this.valueStart = -1
+          } else if (this.depth === 1) {
+            this.closed = true
+          }
+          this.depth--
+          break
+        case ',':
+          if (this.depth === 1) this.expectKey = true
+          break
+      }
+    }
+
+    this.compact()
+    return events
+  }
+
+  // Assembles the plan from the pieces already validated during push()
+  end(): SitePlan {
+    if (!this.closed) throw new Error('Incomplete site plan JSON')
+    if (!this.meta || !this.style) throw new Error('Site plan is missing meta or style')
+
+    return {
+      meta: this.meta,
+      assets: this.assets ?? { images: [] },
+      sections: this.sections,
+      style: this.style
+    }
+  }
+
+  // Drops text that no pending key, member or section still points into
+  private compact() {
+    let keep = this.pos
+    if (this.keyStart >= 0 && this.keyStart < keep) keep = this.keyStart
+    if (this.valueStart >= 0 && this.valueStart < keep) keep = this.valueStart
+    if (this.sectionStart >= 0 && this.sectionStart < keep) keep = this.sectionStart
+    if (keep === 0) return
+
+    this.buffer = this.buffer.slice(keep)
+    this.pos -= keep
+    if (this.keyStart >= 0) this.keyStart -= keep
+    if (this.valueStart >= 0) this.valueStart -= keep
+    if (this.sectionStart >= 0) this.sectionStart -= keep
+  }
+
+  private memberEvent(json: string): PlanStreamEvent | null {
+    switch (this.key) {
+      case 'meta':
+        this.meta = parsePiece('meta', SiteMetaSchema, json)
+        return { type: 'meta', meta: this.meta }
+      case 'assets':
+        this.assets = parsePiece('assets', SiteAssetsSchema, json)
+        return { type: 'assets', assets: this.assets }
+      case 'style':
+        this.style = parsePiece('style', SiteStyleSchema, json)
+        return { type: 'style', style: this.style }
+      default:
+        return null
+    }
+  }
+}
+
+function parsePiece<T>(name: string, schema: ZodType<T>, json: string): T {
+  const result = schema.safeParse(JSON.parse(json))
+  if (!result.success) {
+    throw new Error(`Invalid site plan ${name}: ${result.error.issues[0]?.message ?? 'schema mismatch'}`)
+  }
+  return result.data
+}
@@ -0,0 +1,179 @@
+import * as React from 'react'
+import * as ReactDOM from 'react-dom'
+import * as ReactDOMClient from 'react-dom/client'
+import * as JsxRuntime from 'react/jsx-runtime'
+import { GeneratedFiles } from './validation'
+
+// Runs react and next output in the preview iframe: modules are transpiled in
+// a worker, then wrapped in a small CommonJS loader inside the page. React
+// itself is borrowed from this page, which the same-origin iframe can reach,
+// so the only download is the compiler, once, on the first such preview.
+
+type Files = GeneratedFiles['files']
+
+export interface AppEntry {
+  kind: 'react' | 'next'
+  // The module that mounts the app (react) or the page component (next)
+  path: string
+}
+
+interface TranspiledModule {
+  path: string
+  code: string
+}
+
+const SCRIPT_FILE = /\.(m?jsx?|tsx?)$/
+const REACT_ENTRIES = ['src/main.jsx', 'src/main.tsx', 'src/main.js', 'src/index.jsx', 'src/index.tsx', 'src/index.js']
+const NEXT_PAGE = /^(src\/)?app\/page\.(jsx?|tsx?)$/
+const SHARED_MODULES = '__sorenaPreviewModules'
+const STYLE_MODULE = '__preview_style__'
+const ENTRY_MODULE = '__preview_entry__'
+
+const DEFAULT_DOCUMENT = `<!DOCTYPE html>
+<html>
+<head>
+  <meta charset="utf-8" />
+  <meta name="viewport" content="width=device-width, initial-scale=1" />
+</head>
+<body>
+  <div id="root"></div>
+</body>
+</html>`
+
+// Evaluated inside the iframe with the module definitions and the entry path
+const LOADER = `function (definitions, entry) {
+  var shared = Object.assign({}, parent.${SHARED_MODULES})
+  shared['${STYLE_MODULE}'] = function (css) {
+    var style = document.createElement('style')
+    style.textContent = css
+    document.head.appendChild(style)
+  }
+  var cache = {}
+  var suffixes = ['', '.js', '.jsx', '.ts', '.tsx', '.mjs', '/index.js', '/index.jsx', '/index.ts', '/index.tsx']
+
+  function resolve(from, request) {
+    if (request.charAt(0) !== '.' && request.charAt(0) !== '/') return request
+    var parts = request.charAt(0) === '/' ? [] : from.split('/').slice(0, -1)
+    request.split('/').forEach(function (part) {
+      if (part === '..') parts.pop()
+      else if (part && part !== '.') parts.push(part)
+    })
+    var base = parts.join('/')
+    for (var i = 0; i < suffixes.length; i++) {
+      if (definitions[base + suffixes[i]]) return base + suffixes[i]
+    }
+    return base
+  }
+
+  function load(path) {
+    if (cache[path]) return cache[path].exports
+    if (Object.prototype.hasOwnProperty.call(shared, path)) return shared[path]
+    var define = definitions[path]
+    if (!define) throw new Error('Cannot find module "' + path + '"')
+
+    var module = cache[path] = { exports: {} }
+    define(function (request) { return load(resolve(path, request)) }, module, module.exports)
+    return module.exports
+  }
+
+  try {
+    load(entry)
+  } catch (error) {
+    var pre = document.createElement('pre')
+    pre.style.cssText = 'color:#b91c1c;padding:16px;white-space:pre-wrap'
+    pre.textContent = error && error.stack || String(error)
+    document.body.prepend(pre)
+  }
+}`
+
+export function appEntry(files: Files): AppEntry | undefined {
+  const paths = new Set(files.map(file => file.path))
+  const react = REACT_ENTRIES.find(path => paths.has(path))
+  if (react) return { kind: 'react', path: react }
+
+  const page = files.find(file => NEXT_PAGE.test(file.path))
+  return page && { kind: 'next', path: page.path }
+}
+
+// Plain objects without __esModule, so both default and named imports
+// compiled with esModuleInterop find what they expect
+function shareModules() {
+  const host = window as any
+  host[SHARED_MODULES] ??= {
+    react: { ...React, default: React },
+    'react-dom': { ...ReactDOM, default: ReactDOM },
+    'react-dom/client': { ...ReactDOMClient, default: ReactDOMClient },
+    'react/jsx-runtime': JsxRuntime,
+    'react/jsx-dev-runtime': JsxRuntime
+  }
+}
+
+let bundler: Worker | undefined
+let nextRequest = 0
+const pending = new Map<number, { resolve: (modules: TranspiledModule[]) => void; reject: (error: Error) => void }>()
+
+// One worker for the whole page; it keeps its transpile cache between builds
+function transpile(files: Files): Promise<TranspiledModule[]> {
+  if (!bundler) {
+    bundler = new Worker(new URL('./preview-bundler.worker.ts', import.meta.url))
+    bundler.onmessage = event => {
+      const { id, modules, error } = event.data
+      const request = pending.get(id)
+      pending.delete(id)
+      if (error) request?.reject(new Error(error))
+      else request?.resolve(modules)
+    }
+    bundler.onerror = event => {
+      pending.forEach(request => request.reject(new Error(event.message || 'Preview bundler failed')))
+      pending.clear()
+      bundler = undefined
+    }
+  }
+
+  const id = nextRequest++
+  return new Promise((resolve, reject) => {
+    pending.set(id, { resolve, reject })
+    bundler!.postMessage({ id, files })
+  })
+}
+
+// Next pages render inside their layout's <html>, which cannot nest in the
+// preview body, so the page mounts on its own and the layout only lends its
+// title and imported styles
+function nextEntry(files: Files, page: string): string {
+  const layout = page.replace(/page\.\w+$/, 'layout')
+  const hasLayout = files.some(file => file.path.startsWith(`${layout}.`))
+
+  return `function (require) {
+  var React = require('react')
+  ${hasLayout ? `var layout = require('./${layout}')
+  if (layout.metadata && layout.metadata.title) document.title = layout.metadata.title` : ''}
+  var Page = require('./${page}').default
+  require('react-dom/client').createRoot(document.getElementById('root')).render(React.createElement(Page))
+}`
+}
+
+// The page to load into the iframe's srcDoc, with every module inlined
+export async function buildAppDocument(files: Files, entry: AppEntry): Promise<string> {
+  shareModules()
+  const modules = await transpile(files.filter(file => SCRIPT_FILE.test(file.path)))
+
+  const definitions = [
+    ...modules.map(module => `${JSON.stringify(module.path)}: function (require, module, exports) {\n${module.code}\n}`),
+    ...files
+      .filter(file => file.path.endsWith('.css'))
+      .map(file => `${JSON.stringify(file.path)}: function (require) { require('${STYLE_MODULE}')(${JSON.stringify(file.content)}) }`)
+  ]
+  if (entry.kind === 'next') definitions.push(`${JSON.stringify(ENTRY_MODULE)}: ${nextEntry(files, entry.path)}`)
+
+  const start = entry.kind === 'react' ? entry.path : ENTRY_MODULE
+  const code = `(${LOADER})({\n${definitions.join(',\n')}\n}, ${JSON.stringify(start)})`
+  // Keeps module code from closing the inline script early
+  const script = `<script>${code.replace(/<\/script/gi, '<\\/script')}</script>`
+
+  const html = entry.kind === 'react'
+    ? files.find(file => file.path === 'public/index.html')?.content ?? DEFAULT_DOCUMENT
+    : DEFAULT_DOCUMENT
+  const end = html.lastIndexOf('</body>')
+  return end === -1 ? html + script : html.slice(0, end) + script + html.slice(end)
+}
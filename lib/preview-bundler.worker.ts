@@ -0,0 +1,85 @@
+import type * as TypeScript from 'typescript'
+
+// Transpiles generated JSX/TSX modules to CommonJS for the in-browser preview.
+// Runs in a Web Worker so the compiler never blocks the page.
+
+interface TranspileRequest {
+  id: number
+  files: Array<{ path: string; content: string }>
+}
+
+// Worker globals, which the DOM typings this project compiles with lack
+const scope = self as unknown as Worker & {
+  importScripts(...urls: string[]): void
+  ts?: typeof TypeScript
+}
+
+// The compiler is about 9 MB, so it is not bundled into the worker: it is
+// fetched on the first React or Next preview, and the browser caches it.
+// next.config.mjs copies the installed typescript into public/vendor and
+// sets this to its same-origin path.
+const TYPESCRIPT_URL = process.env.TYPESCRIPT_URL!
+
+let compiler: { ts: typeof TypeScript; options: TypeScript.CompilerOptions } | undefined
+
+function typescript() {
+  if (!compiler) {
+    // A classic script that defines the global `ts`
+    scope.importScripts(TYPESCRIPT_URL)
+    const ts = scope.ts!
+    compiler = {
+      ts,
+      options: {
+        module: ts.ModuleKind.CommonJS,
+        target: ts.ScriptTarget.ES2020,
+        // The automatic runtime, since generated pages do not all import React
+        jsx: ts.JsxEmit.ReactJSX,
+        esModuleInterop: true
+      }
+    }
+  }
+  return compiler
+}
+
+// Output by file extension and content hash, so a rebuild after a one-file
+// edit only transpiles that file; oldest entries go first beyond the limit
+const transpiled = new Map<string, string>()
+const MAX_CACHED_MODULES = 500
+
+async function sha256(text: string): Promise<string> {
+  const digest = await crypto.subtle.digest('SHA-256', new TextEncoder().encode(text))
+  return Array.from(new Uint8Array(digest), byte => byte.toString(16).padStart(2, '0')).join('')
+}
+
+async function transpile(path: string, content: string): Promise<string> {
+  // The extension decides whether TypeScript syntax is allowed
+  const key = `${path.slice(path.lastIndexOf('.'))}:${await sha256(content)}`
+  const cached = transpiled.get(key)
+  if (cached !== undefined) return cached
+
+  const { ts, options } = typescript()
+  const { outputText } = ts.transpileModule(content, {
+    fileName: path,
+    compilerOptions: options
+  })
+
+  transpiled.set(key, outputText)
+  if (transpiled.size > MAX_CACHED_MODULES) {
+    transpiled.delete(transpiled.keys().next().value as string)
+  }
+  return outputText
+}
+
+scope.onmessage = async (event: MessageEvent<TranspileRequest>) => {
+  const { id, files } = event.data
+
+  try {
+    const modules = await Promise.all(files.map(async file => ({
+      path: file.path,
+      code: await transpile(file.path, file.content)
+    })))
+    scope.postMessage({ id, modules })
+  } catch (error: any) {
+    scope.postMessage({ id, error: error.message || 'Failed to transpile preview' })
+  }
+}
@@ -0,0 +1,75 @@
+import { GeneratedFiles } from './validation'
+
+// Browser side of public/preview-sw.js: publishes a file set to the worker and
+// names the URLs the preview iframe loads it from
+
+type Files = GeneratedFiles['files']
+
+const WORKER_SCRIPT = '/preview-sw.js'
+export const PREVIEW_SCOPE = '/preview-fs/'
+
+// A stopped or replaced worker should not leave the preview waiting
+const PUBLISH_TIMEOUT_MS = 5000
+
+let registration: Promise<ServiceWorkerRegistration | undefined> | undefined
+
+// The worker's scope does not cover the page registering it, so
+// navigator.serviceWorker.ready never settles here; wait for activation instead
+function previewRegistration(): Promise<ServiceWorkerRegistration | undefined> {
+  if (!registration) {
+    registration = (async () => {
+      if (typeof navigator === 'undefined' || !('serviceWorker' in navigator)) return undefined
+
+      const reg = await navigator.serviceWorker.register(WORKER_SCRIPT, { scope: PREVIEW_SCOPE })
+      const worker = reg.installing || reg.waiting
+      if (worker) {
+        await new Promise<void>(resolve => {
+          const settle = () => {
+            if (worker.state !== 'activated' && worker.state !== 'redundant') return
+            worker.removeEventListener('statechange', settle)
+            resolve()
+          }
+          worker.addEventListener('statechange', settle)
+          settle()
+        })
+      }
+      return reg
+    })().catch(error => {
+      console.warn('Preview file server unavailable:', error)
+      return undefined
+    })
+  }
+  return registration
+}
+
+// The first HTML file, the same page the inline srcDoc preview shows
+export function previewEntry(files: Files): string | undefined {
+  return files.find(file => file.path.endsWith('.html'))?.path
+}
+
+export function previewUrl(revision: string, path: string): string {
+  return `${PREVIEW_SCOPE}${revision}/${path.split('/').map(encodeURIComponent).join('/')}`
+}
+
+// Resolves to the revision the files are served under, or undefined where
+// service workers are unavailable and callers should fall back to srcDoc
+export async function publishPreviewFiles(files: Files): Promise<string | undefined> {
+  // Read at publish time, since an updated worker replaces the active one
+  const worker = (await previewRegistration())?.active
+  if (!worker) return undefined
+
+  const channel = new MessageChannel()
+  const reply = new Promise<{ revision?: string; error?: string }>((resolve, reject) => {
+    const timer = setTimeout(() => reject(new Error('Preview file server did not respond')), PUBLISH_TIMEOUT_MS)
+    channel.port1.onmessage = event => {
+      clearTimeout(timer)
+      resolve(event.data)
+    }
+  })
+
+  worker.postMessage({ type: 'publish', files }, [channel.port2])
+  const { revision, error } = await reply
+  channel.port1.close()
+  if (error) throw new Error(error)
+  return revision
+}
@@ -0,0 +1,172 @@
+import { GeneratedFiles } from './validation'
+
+// Hot patching for the preview iframe: instead of reloading the page when
+// files change, the parent posts the sections and stylesheets that differ and
+// a small runtime injected into the page swaps them in place, keeping the
+// parsed DOM and scroll position. Sections are only swapped on pages without
+// scripts, whose listeners would otherwise be lost with the old nodes.
+
+type Files = GeneratedFiles['files']
+
+export const PATCH_MESSAGE = 'sorena:preview-patch'
+export const READY_MESSAGE = 'sorena:preview-ready'
+// Sent by the runtime when a patch does not fit the page, asking for a reload
+export const STALE_MESSAGE = 'sorena:preview-stale'
+
+export interface PreviewPatch {
+  // Stylesheets by path, replaced wholesale
+  styles: Array<{ path: string; css: string }>
+  // Changed or new top-level sections, and every section id in page order;
+  // order is absent when the page markup did not change
+  sections: Array<{ id: string; html: string }>
+  order?: string[]
+}
+
+const RUNTIME = `(function () {
+  function stale() {
+    parent.postMessage({ type: '${STALE_MESSAGE}' }, '*')
+  }
+
+  function stylesheet(path) {
+    var style = document.querySelector('style[data-preview-href="' + CSS.escape(path) + '"]')
+    if (style) return style
+
+    var link = Array.prototype.find.call(document.querySelectorAll('link[rel="stylesheet"]'), function (l) {
+      return (l.getAttribute('href') || '').replace(/^\\.?\\//, '') === path
+    })
+    if (!link) return null
+    style = document.createElement('style')
+    style.setAttribute('data-preview-href', path)
+    link.replaceWith(style)
+    return style
+  }
+
+  function applySections(patch) {
+    var first = patch.order.map(function (id) { return document.getElementById(id) }).find(Boolean)
+    var container = first ? first.parentElement : document.querySelector('main')
+    if (!container) return false
+
+    var wanted = new Set(patch.order)
+    container.querySelectorAll(':scope > section[id]').forEach(function (section) {
+      if (!wanted.has(section.id)) section.remove()
+    })
+
+    var replacements = new Map(patch.sections.map(function (s) { return [s.id, s.html] }))
+    var previous = null
+    for (var i = 0; i < patch.order.length; i++) {
+      var id = patch.order[i]
+      var node = document.getElementById(id)
+      if (replacements.has(id)) {
+        var template = document.createElement('template')
+        template.innerHTML = replacements.get(id)
+        var fresh = template.content.firstElementChild
+        if (node) node.replaceWith(fresh)
+        node = fresh
+      }
+      if (!node) return false
+
+      // Move only sections that are out of place
+      if (previous) {
+        if (previous.nextElementSibling !== node) previous.after(node)
+      } else {
+        var head = container.querySelector(':scope > section[id]')
+        if (head !== node) head ? head.before(node) : container.prepend(node)
+      }
+      previous = node
+    }
+    return true
+  }
+
+  window.addEventListener('message', function (event) {
+    if (event.source !== parent || !event.data || event.data.type !== '${PATCH_MESSAGE}') return
+    var patch = event.data.patch
+
+    for (var i = 0; i < patch.styles.length; i++) {
+      var style = stylesheet(patch.styles[i].path)
+      if (!style) return stale()
+      style.textContent = patch.styles[i].css
+    }
+    if (patch.order && !applySections(patch)) stale()
+  })
+
+  parent.postMessage({ type: '${READY_MESSAGE}' }, '*')
+})()`
+
+// Adds the runtime at the end of the body, after the page's own scripts
+export function injectPreviewRuntime(html: string): string {
+  const tag = `<script data-preview-runtime>${RUNTIME}</script>`
+  const end = html.lastIndexOf('</body>')
+  return end === -1 ? html + tag : html.slice(0, end) + tag + html.slice(end)
+}
+
+export function withPreviewRuntime(files: Files, entry: string): Files {
+  return files.map(file => file.path === entry ? { ...file, content: injectPreviewRuntime(file.content) } : file)
+}
+
+// Top-level sections with ids: not nested in another such section
+function topSections(doc: Document): Element[] {
+  return Array.from(doc.querySelectorAll('section[id]'))
+    .filter(section => !section.parentElement?.closest('section[id]'))
+}
+
+// The page with its sections taken out, whitespace collapsed
+function skeleton(doc: Document, sections: Element[]): string {
+  const attributes = Array.from(doc.documentElement.attributes, a => `${a.name}=${a.value}`).join(' ')
+  sections.forEach(section => section.remove())
+  return `${attributes}\n${doc.head.innerHTML}\n${doc.body.innerHTML}`.replace(/\s+/g, ' ')
+}
+
+function diffSections(before: string, after: string): Pick<PreviewPatch, 'sections' | 'order'> | undefined {
+  const parser = new DOMParser()
+  const previous = parser.parseFromString(before, 'text/html')
+  const next = parser.parseFromString(after, 'text/html')
+  const oldSections = topSections(previous)
+  const newSections = topSections(next)
+
+  // Scripts ran once on load and may have attached listeners to the sections
+  // being replaced; running them again would double up on the others
+  if (next.querySelector('script')) return undefined
+
+  const order = newSections.map(section => section.id)
+  const container = newSections[0]?.parentElement
+  if (!container || new Set(order).size !== order.length) return undefined
+  if (newSections.some(section => section.parentElement !== container)) return undefined
+
+  const oldMarkup = new Map(oldSections.map(section => [section.id, section.outerHTML]))
+  const sections = newSections
+    .filter(section => oldMarkup.get(section.id) !== section.outerHTML)
+    .map(section => ({ id: section.id, html: section.outerHTML }))
+
+  // Anything that changed outside the sections needs a reload
+  if (skeleton(previous, oldSections) !== skeleton(next, newSections)) return undefined
+  return { sections, order }
+}
+
+// A patch turning the page built from `before` into the one built from
+// `after`, or undefined when only a reload will do: files added or removed,
+// scripts changed, sections changed on a page with scripts, or page markup
+// changed outside its sections
+export function previewPatch(before: Files, after: Files, entry: string): PreviewPatch | undefined {
+  if (before.length !== after.length) return undefined
+
+  const previous = new Map(before.map(file => [file.path, file.content]))
+  const patch: PreviewPatch = { styles: [], sections: [] }
+
+  for (const file of after) {
+    const old = previous.get(file.path)
+    if (old === undefined) return undefined
+    if (old === file.content) continue
+
+    if (file.path.endsWith('.css')) {
+      patch.styles.push({ path: file.path, css: file.content })
+    } else if (file.path === entry) {
+      const sections = diffSections(old, file.content)
+      if (!sections) return undefined
+      Object.assign(patch, sections)
+    } else {
+      return undefined
+    }
+  }
+
+  return patch
+}
@@ -0,0 +1,74 @@
+import path from 'path'
+import { BuildRequest, GeneratedFiles, SitePlan } from './validation'
+import { TieredCache, TieredCacheOptions } from './cache'
+import { hashValue, sha256 } from './hash'
+import { globalSingleton } from './singleton'
+
+type Files = GeneratedFiles['files']
+
+// What a project's files were built from, so section edits start from the
+// server's copy instead of a plan uploaded with every request
+export interface ProjectSource {
+  plan: SitePlan
+  framework: BuildRequest['framework']
+  // Fragment cache revision of each section, see buildFilesFromPlan
+  revisions: string[]
+}
+
+const storeDir = process.env.PROJECT_STORE_DIR || undefined
+
+function storeOptions(dir = storeDir): TieredCacheOptions {
+  return {
+    ttlMs: Number(process.env.PROJECT_STORE_TTL_MS) || 24 * 60 * 60 * 1000,
+    maxEntries: Number(process.env.PROJECT_STORE_MAX_ENTRIES) || 1000,
+    maxBytes: Number(process.env.PROJECT_STORE_MAX_BYTES) || 200 * 1024 * 1024,
+    dir,
+    maxDiskEntries: Number(process.env.PROJECT_STORE_MAX_DISK_ENTRIES) || 10000
+  }
+}
+
+const projectStore = globalSingleton('projectStore', () => new TieredCache<Files>(storeOptions()))
+
+const sourceStore = globalSingleton('projectSourceStore', () =>
+  new TieredCache<ProjectSource>(storeOptions(storeDir && path.join(storeDir, 'sources')))
+)
+
+const PROJECT_ID = /^[a-f0-9]{64}$/
+
+// Content address of a file set: the same files always get the same id,
+// whatever order they are listed in. digests[i] is the sha256 of files[i]'s
+// content, so callers that also need per-file hashes compute them once.
+export function projectIdFromDigests(files: Files, digests: string[]): string {
+  return hashValue(
+    files
+      .map((file, i) => [file.path, digests[i]])
+      .sort((a, b) => (a[0] < b[0] ? -1 : a[0] > b[0] ? 1 : 0))
+  )
+}
+
+// Hashed in-thread: generation responses must not queue behind export
+// compression on the worker pool
+export function projectId(files: Files): string {
+  return projectIdFromDigests(files, files.map(file => sha256(file.content)))
+}
+
+export function isProjectId(value: unknown): value is string {
+  return typeof value === 'string' && PROJECT_ID.test(value)
+}
+
+export async function saveProject(files: Files, source?: ProjectSource): Promise<string> {
+  const id = projectId(files)
+  await Promise.all([projectStore.set(id, files), source && sourceStore.set(id, source)])
+  return id
+}
+
+export async function loadProject(id: string): Promise<Files | undefined> {
+  // Ids double as file names in the disk tier, so anything else is rejected
+  if (!isProjectId(id)) return undefined
+  return projectStore.get(id)
+}
+
+export async function loadProjectSource(id: string): Promise<ProjectSource | undefined> {
+  if (!isProjectId(id)) return undefined
+  return sourceStore.get(id)
+}
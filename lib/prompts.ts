@@ -1,4 +1,7 @@
-import { BuildRequest } from './validation'
+import { BuildRequest, SitePlan, SiteSection } from './validation'
+
+// Bump when prompt wording changes so cached plans from older prompts are not reused
+export const PROMPT_VERSION = 1
 
 export const SYSTEM_PROMPT = `
 You are a senior frontend architect that outputs strict JSON conforming to the given TypeScript types.
@@ -30,4 +33,78 @@ Rules:
 - keep brand tone: ${req.brand?.tone ?? 'neutral'}.
 - Generate actual content in the specified language (${req.language === 'fa' ? 'Persian/Farsi' : 'English'})
 - For Persian text, use proper Persian/Farsi characters and RTL-appropriate content
-`
\ No newline at end of file
+`
+
+// Prompts for sectioned generation: one outline completion for meta, assets and
+// style, and one small completion per requested section, run concurrently
+export const OUTLINE_SYSTEM_PROMPT = `
+You are a senior frontend architect that outputs strict JSON conforming to the given TypeScript types.
+Return ONLY valid JSON without any markdown formatting or code blocks.
+
+The JSON must conform to this TypeScript interface:
+{
+  meta: { title: string; description: string; language: string };
+  assets: { images: Array<{id:string; prompt?:string; url?:string}> };
+  style: { colors: Record<string,string>; font?: string };
+}
+`
+
+export const OUTLINE_USER_PROMPT = (req: BuildRequest) => `
+Build the site outline for this request:
+${JSON.stringify(req, null, 2)}
+
+Rules:
+- language: ${req.language}
+- style.colors should include primary, secondary, text and background.
+- for images, use placeholder URLs like "https://via.placeholder.com/800x400"
+- keep brand tone: ${req.brand?.tone ?? 'neutral'}.
+- Generate actual content in the specified language (${req.language === 'fa' ? 'Persian/Farsi' : 'English'})
+`
+
+export const SECTION_SYSTEM_PROMPT = `
+You are a senior frontend architect that outputs strict JSON conforming to the given TypeScript types.
+Generate one section of a minimal, semantic, accessible site.
+Return ONLY valid JSON without any markdown formatting or code blocks.
+
+The JSON must conform to this TypeScript interface:
+{
+  id: string;
+  type: string;
+  props: Record<string, any>;
+}
+`
+
+export const SECTION_USER_PROMPT = (req: BuildRequest, type: string, index: number) => `
+Build section ${index + 1} of ${req.sections.length} (type "${type}") for this request:
+${JSON.stringify(req, null, 2)}
+
+Rules:
+- type must be "${type}".
+- the other sections of the site are: ${req.sections.filter((_, i) => i !== index).join(', ') || 'none'}.
+- text must be realistic and concise.
+- keep brand tone: ${req.brand?.tone ?? 'neutral'}.
+- Generate actual content in the specified language (${req.language === 'fa' ? 'Persian/Farsi' : 'English'})
+- For Persian text, use proper Persian/Farsi characters and RTL-appropriate content
+`
+
+// Compact context for editing one section: no full request, no other sections' props
+export const SECTION_EDIT_USER_PROMPT = (
+  plan: SitePlan,
+  section: SiteSection,
+  neighbors: string[],
+  instruction: string
+) => `
+Rewrite this section of an existing site:
+${JSON.stringify(section)}
+
+Site: ${JSON.stringify(plan.meta)}
+Colors: ${JSON.stringify(plan.style.colors)}
+Surrounding sections: ${neighbors.join(', ') || 'none'}
+
+Instruction: ${instruction}
+
+Rules:
+- keep id "${section.id}" and type "${section.type}".
+- change only what the instruction asks for; keep the props shape.
+- write in the site's language (${plan.meta.language}).
+`
@@ -0,0 +1,90 @@
+import OpenAI from 'openai'
+import { BuildRequest, SiteSection } from './validation'
+import { globalSingleton } from './singleton'
+import { LocalProvider } from './local-provider'
+
+export type ChatMessage = { role: 'system' | 'user'; content: string }
+
+// What a completion is for, so stand-in providers can answer without parsing prompts
+export type CompletionTask =
+  | { kind: 'plan'; request: BuildRequest }
+  | { kind: 'outline'; request: BuildRequest }
+  | { kind: 'section'; request: BuildRequest; sectionType: string; index: number }
+  | { kind: 'section-edit'; section: SiteSection; instruction: string }
+
+export interface CompletionRequest {
+  messages: ChatMessage[]
+  temperature: number
+  task: CompletionTask
+  signal?: AbortSignal
+  // Called with the total tokens the completion used, where the provider reports it
+  onUsage?: (tokens: number) => void
+}
+
+// A chat model that answers with a JSON object, either whole or as text deltas
+export interface ModelProvider {
+  readonly model: string
+  complete(request: CompletionRequest): Promise<string>
+  stream(request: CompletionRequest): AsyncIterable<string>
+}
+
+export class OpenAIProvider implements ModelProvider {
+  private client?: OpenAI
+
+  constructor(readonly model: string) {}
+
+  async complete({ messages, temperature, signal, onUsage }: CompletionRequest): Promise<string> {
+    const completion = await this.openai().chat.completions.create({
+      model: this.model,
+      response_format: { type: 'json_object' },
+      messages,
+      temperature
+    }, { signal })
+    if (completion.usage) onUsage?.(completion.usage.total_tokens)
+
+    const json = completion.choices[0].message?.content
+    if (!json) throw new Error('Empty AI response')
+    return json
+  }
+
+  async *stream({ messages, temperature, signal, onUsage }: CompletionRequest): AsyncIterable<string> {
+    const stream = await this.openai().chat.completions.create({
+      model: this.model,
+      response_format: { type: 'json_object' },
+      messages,
+      temperature,
+      stream: true,
+      // Adds a final chunk with no choices that carries the usage
+      stream_options: { include_usage: true }
+    }, { signal })
+
+    for await (const chunk of stream) {
+      if (chunk.usage) onUsage?.(chunk.usage.total_tokens)
+      const delta = chunk.choices[0]?.delta?.content
+      if (delta) yield delta
+    }
+  }
+
+  // Built on first use so importing this module needs no API key
+  private openai() {
+    if (!this.client) {
+      this.client = new OpenAI({ apiKey: process.env.OPENAI_API_KEY! })
+    }
+    return this.client
+  }
+}
+
+// MODEL_PROVIDER=local swaps in the offline stand-in for load tests
+export function getModelProvider(): ModelProvider {
+  return globalSingleton('modelProvider', () => {
+    if (process.env.MODEL_PROVIDER === 'local') {
+      return new LocalProvider({
+        latencyMs: Number(process.env.LOCAL_PROVIDER_LATENCY_MS) || 0,
+        latencySigma: Number(process.env.LOCAL_PROVIDER_LATENCY_SIGMA) || 0,
+        chunkSize: Number(process.env.LOCAL_PROVIDER_CHUNK_SIZE) || 64,
+        chunkIntervalMs: Number(process.env.LOCAL_PROVIDER_CHUNK_INTERVAL_MS) || 0
+      })
+    }
+    return new OpenAIProvider(process.env.AI_MODEL || 'gpt-4o-mini')
+  })
+}
@@ -0,0 +1,201 @@
+import { sleep } from './concurrency'
+
+export class TimeoutError extends Error {
+  name = 'TimeoutError'
+}
+
+export interface RetryPolicy {
+  attempts: number
+  // Deadline for each attempt, applied with withDeadline once the attempt
+  // has a scheduler slot so that queueing never counts against it
+  attemptTimeoutMs: number
+  baseDelayMs: number
+  maxDelayMs: number
+}
+
+export interface HedgePolicy {
+  // Launch a second attempt once the first has been served this long
+  afterMs: number
+  // Asked when the hedge is due; returning false skips it, e.g. while calls
+  // are queueing and a hedge would only add load
+  canHedge?: () => boolean
+}
+
+type Attempt<T> = (signal: AbortSignal) => Promise<T>
+// onStart is called when the attempt stops waiting and starts being served
+type ServedAttempt<T> = (signal: AbortSignal, onStart: () => void) => Promise<T>
+
+// Keeps the most recent durations to estimate tail latency
+export class LatencyTracker {
+  private samples: number[] = []
+  private next = 0
+
+  constructor(private capacity = 200) {}
+
+  record(ms: number) {
+    if (this.samples.length < this.capacity) {
+      this.samples.push(ms)
+    } else {
+      this.samples[this.next] = ms
+      this.next = (this.next + 1) % this.capacity
+    }
+  }
+
+  percentile(p: number): number | undefined {
+    if (!this.samples.length) return undefined
+    const sorted = [...this.samples].sort((a, b) => a - b)
+    return sorted[Math.min(sorted.length - 1, Math.floor(p * sorted.length))]
+  }
+
+  get count() {
+    return this.samples.length
+  }
+}
+
+// Network failures, timeouts, rate limits, server errors and malformed JSON are
+// worth another try; bad requests and our own load shedding are not
+export function isRetryable(error: any): boolean {
+  if (error?.name === 'QueueFullError' || error?.name === 'AbortError') return false
+  if (error instanceof TimeoutError || error instanceof SyntaxError) return true
+
+  const status = error?.status
+  if (typeof status === 'number') return status === 408 || status === 409 || status === 429 || status >= 500
+
+  return /connection|network|ECONNRESET|ETIMEDOUT|socket/i.test(`${error?.name} ${error?.message}`)
+}
+
+// Full jitter: a random delay up to the exponential bound
+export function backoffDelay(attempt: number, { baseDelayMs, maxDelayMs }: RetryPolicy): number {
+  return Math.random() * Math.min(maxDelayMs, baseDelayMs * 2 ** (attempt - 1))
+}
+
+export async function withRetries<T>(
+  fn: (signal: AbortSignal, attempt: number) => Promise<T>,
+  policy: RetryPolicy,
+  signal = new AbortController().signal
+): Promise<T> {
+  for (let attempt = 1; ; attempt++) {
+    try {
+      return await fn(signal, attempt)
+    } catch (error) {
+      if (attempt >= policy.attempts || signal.aborted || !isRetryable(error)) throw error
+      console.warn(`AI attempt ${attempt} failed, retrying:`, (error as Error).message)
+      await sleep(backoffDelay(attempt, policy), signal)
+    }
+  }
+}
+
+// Runs fn, and if it has been served for afterMs without settling starts a
+// second copy. The hedge clock starts at onStart, so time spent queueing never
+// triggers a hedge. The first success wins and the other copy is aborted.
+// Failures are left to the caller's retries: a non-retryable one fails at
+// once, a retryable one waits for a hedge that is already running.
+export function hedged<T>(fn: ServedAttempt<T>, policy: HedgePolicy, signal?: AbortSignal): Promise<T> {
+  return new Promise((resolve, reject) => {
+    const controllers: AbortController[] = []
+    let running = 0
+    let settled = false
+    let timer: ReturnType<typeof setTimeout> | undefined
+
+    const finish = (winner?: AbortController) => {
+      settled = true
+      clearTimeout(timer)
+      controllers.forEach(c => c !== winner && c.abort())
+    }
+
+    const launch = (onStart: () => void) => {
+      const controller = linkedController(signal)
+      controllers.push(controller)
+      running++
+
+      fn(controller.signal, onStart).then(
+        value => {
+          if (settled) return
+          finish(controller)
+          resolve(value)
+        },
+        error => {
+          running--
+          if (settled) return
+          if (running === 0 || !isRetryable(error)) {
+            finish()
+            reject(error)
+          }
+        }
+      )
+    }
+
+    launch(() => {
+      timer = setTimeout(() => {
+        if (settled || (policy.canHedge && !policy.canHedge())) return
+        launch(() => {})
+      }, policy.afterMs)
+    })
+  })
+}
+
+// Runs fn with a signal that aborts after timeoutMs. The returned promise
+// rejects with a TimeoutError at the deadline even if fn ignores its signal.
+export function withDeadline<T>(fn: Attempt<T>, timeoutMs: number, signal?: AbortSignal): Promise<T> {
+  const controller = linkedController(signal)
+  let timer: ReturnType<typeof setTimeout> | undefined
+  const deadline = new Promise<never>((_, reject) => {
+    timer = setTimeout(() => {
+      const error = new TimeoutError(`AI attempt exceeded ${timeoutMs}ms`)
+      controller.abort(error)
+      reject(error)
+    }, timeoutMs)
+  })
+
+  return Promise.race([fn(controller.signal), deadline]).finally(() => clearTimeout(timer))
+}
+
+// withDeadline for a streamed attempt: every wait for the next delta is raced
+// against the deadline, so a stalled stream fails instead of hanging
+export async function* withStreamDeadline<T>(
+  fn: (signal: AbortSignal) => AsyncIterable<T>,
+  timeoutMs: number,
+  signal?: AbortSignal
+): AsyncGenerator<T> {
+  const controller = linkedController(signal)
+  let timer: ReturnType<typeof setTimeout> | undefined
+  const deadline = new Promise<never>((_, reject) => {
+    timer = setTimeout(() => {
+      const error = new TimeoutError(`AI attempt exceeded ${timeoutMs}ms`)
+      controller.abort(error)
+      reject(error)
+    }, timeoutMs)
+  })
+  // Nobody may be racing it when it fires, e.g. while the consumer is busy
+  deadline.catch(() => {})
+
+  const iterator = fn(controller.signal)[Symbol.asyncIterator]()
+  let done = false
+  try {
+    while (true) {
+      const result = await Promise.race([iterator.next(), deadline])
+      if (result.done) {
+        done = true
+        return
+      }
+      yield result.value
+    }
+  } finally {
+    clearTimeout(timer)
+    if (!done) {
+      // Not awaited: return() on a generator stuck in next() would wait for it
+      controller.abort()
+      iterator.return?.().catch(() => {})
+    }
+  }
+}
+
+function linkedController(parent?: AbortSignal): AbortController {
+  const controller = new AbortController()
+  if (parent?.aborted) {
+    controller.abort(parent.reason)
+  } else {
+    parent?.addEventListener('abort', () => controller.abort(parent.reason), { once: true })
+  }
+  return controller
+}
@@ -0,0 +1,124 @@
+// Hands generation results from the generator page to /preview. The latest
+// result is kept in memory for instant navigation and, once it has a project
+// id, in IndexedDB, so a reload or a new tab shows it again without another
+// generation. Records are structured-cloned by IndexedDB, not stringified.
+
+export const RESULT_EVENT = 'sorena:generated-data'
+
+const DB_NAME = 'sorena-results'
+const STORE = 'projects'
+// Projects beyond this many are evicted, least recently opened first
+const MAX_STORED_PROJECTS = 20
+
+interface StoredResult {
+  projectId: string
+  data: any
+  usedAt: number
+}
+
+// The hot copy: the result most recently stored or loaded in this tab
+let current: any
+
+let database: Promise<IDBDatabase | undefined> | undefined
+
+function request<T>(req: IDBRequest<T>): Promise<T> {
+  return new Promise((resolve, reject) => {
+    req.onsuccess = () => resolve(req.result)
+    req.onerror = () => reject(req.error)
+  })
+}
+
+function done(tx: IDBTransaction): Promise<void> {
+  return new Promise((resolve, reject) => {
+    tx.oncomplete = () => resolve()
+    tx.onerror = tx.onabort = () => reject(tx.error)
+  })
+}
+
+// Undefined where IndexedDB is missing or blocked (private modes, SSR);
+// results then only live in memory, as before
+function openDatabase(): Promise<IDBDatabase | undefined> {
+  if (!database) {
+    database = new Promise<IDBDatabase | undefined>((resolve, reject) => {
+      if (typeof indexedDB === 'undefined') return resolve(undefined)
+
+      const req = indexedDB.open(DB_NAME, 1)
+      req.onupgradeneeded = () => {
+        req.result.createObjectStore(STORE, { keyPath: 'projectId' }).createIndex('usedAt', 'usedAt')
+      }
+      req.onsuccess = () => resolve(req.result)
+      req.onerror = () => reject(req.error)
+    }).catch(error => {
+      console.warn('Result storage unavailable:', error)
+      return undefined
+    })
+  }
+  return database
+}
+
+async function evictOldProjects(db: IDBDatabase) {
+  const tx = db.transaction(STORE, 'readwrite')
+  const store = tx.objectStore(STORE)
+  let excess = (await request(store.count())) - MAX_STORED_PROJECTS
+
+  if (excess > 0) {
+    const cursors = store.index('usedAt').openCursor()
+    cursors.onsuccess = () => {
+      const cursor = cursors.result
+      if (!cursor || excess-- <= 0) return
+      cursor.delete()
+      cursor.continue()
+    }
+  }
+  await done(tx)
+}
+
+async function persist(data: any) {
+  const db = await openDatabase()
+  if (!db) return
+
+  const tx = db.transaction(STORE, 'readwrite')
+  const record: StoredResult = { projectId: data.projectId, data, usedAt: Date.now() }
+  tx.objectStore(STORE).put(record)
+  await done(tx)
+  await evictOldProjects(db)
+}
+
+// Shows a result to this tab, including partial results while a generation
+// streams in; complete results with a project id are also saved. Resolves
+// once the save is done. A failed save is only logged, so callers need not
+// wait for it.
+export async function storeResult(data: any): Promise<void> {
+  current = data
+  if (typeof window === 'undefined') return
+
+  window.dispatchEvent(new CustomEvent(RESULT_EVENT, { detail: data }))
+  if (data.projectId && !data.isLoading) {
+    await persist(data).catch(error => console.warn('Failed to save result:', error))
+  }
+}
+
+export function latestResult(): any {
+  return current
+}
+
+// A saved project by id, or the most recently opened one without an id
+export async function loadResult(projectId?: string): Promise<any> {
+  if (current && (!projectId || current.projectId === projectId)) return current
+
+  const db = await openDatabase()
+  if (!db) return undefined
+
+  const tx = db.transaction(STORE, 'readwrite')
+  const store = tx.objectStore(STORE)
+  const record: StoredResult | undefined = projectId
+    ? await request(store.get(projectId))
+    : (await request(store.index('usedAt').openCursor(null, 'prev')))?.value
+
+  // Opening a project counts as use for eviction
+  if (record) store.put({ ...record, usedAt: Date.now() })
+  await done(tx)
+
+  if (record) current = record.data
+  return record?.data
+}
@@ -0,0 +1,225 @@
+export type Priority = 'interactive' | 'batch'
+
+export interface SchedulerOptions {
+  maxConcurrent: number
+  // Waiting jobs beyond this are rejected straight away instead of timing out
+  maxQueue: number
+  // Per-key budget over a fixed one-minute window; unset means unlimited.
+  // Keys over budget are rejected on arrival and never count toward maxQueue.
+  tokensPerMinute?: number
+}
+
+export interface ScheduleOptions {
+  priority?: Priority
+  key?: string
+  tokens?: number
+  // Aborting leaves the queue, e.g. when the client disconnects while waiting
+  signal?: AbortSignal
+}
+
+export interface SchedulerStats {
+  running: number
+  queued: number
+  queuedByPriority: Record<Priority, number>
+  started: number
+  shed: number
+  // Rejected because the caller's token budget for the window was spent
+  overBudget: number
+  avgWaitMs: number
+  maxWaitMs: number
+}
+
+export class QueueFullError extends Error {
+  name = 'QueueFullError'
+
+  constructor(public retryAfterMs: number, message = 'Too many generation requests, please retry shortly') {
+    super(message)
+  }
+}
+
+// Tokens charged to a key's budget when a job was admitted, settled against
+// the provider's reported usage once it finishes
+interface Charge {
+  key: string
+  windowStart: number
+  tokens: number
+}
+
+interface Waiter {
+  charge?: Charge
+  enqueuedAt: number
+  resolve: (release: Release) => void
+}
+
+interface Budget {
+  windowStart: number
+  used: number
+}
+
+// Frees the slot; pass the tokens the job actually used to correct the
+// estimate it was charged
+export type Release = (usedTokens?: number) => void
+
+const WINDOW_MS = 60 * 1000
+
+// Caps concurrent upstream calls. Waiting jobs are served interactive first,
+// then batch. Token budgets are charged when a job is admitted: a key that has
+// spent its budget for the window is turned away with a retry hint rather than
+// parked in the queue, where it would crowd out other callers.
+export class Scheduler {
+  private running = 0
+  private queues: Record<Priority, Waiter[]> = { interactive: [], batch: [] }
+  private budgets = new Map<string, Budget>()
+  private started = 0
+  private shed = 0
+  private overBudget = 0
+  private totalWaitMs = 0
+  private maxWaitMs = 0
+
+  constructor(private options: SchedulerOptions) {}
+
+  // fn can report the tokens it used through its argument
+  async run<T>(fn: (reportUsage: (tokens: number) => void) => Promise<T>, options: ScheduleOptions = {}): Promise<T> {
+    const release = await this.acquire(options)
+    let used: number | undefined
+    try {
+      return await fn(tokens => { used = (used ?? 0) + tokens })
+    } finally {
+      release(used)
+    }
+  }
+
+  // Resolves with a release callback once a slot is granted; for work such as
+  // streams that outlives a single promise
+  acquire({ priority = 'interactive', key = 'default', tokens = 0, signal }: ScheduleOptions = {}): Promise<Release> {
+    if (signal?.aborted) return Promise.reject(signal.reason)
+    if (this.queued() >= this.options.maxQueue) {
+      this.shed++
+      return Promise.reject(new QueueFullError(1000))
+    }
+
+    const now = Date.now()
+    const charge = this.charge(key, tokens, now)
+    if (typeof charge === 'number') {
+      this.overBudget++
+      return Promise.reject(new QueueFullError(charge - now, 'Token budget for this client is used up, please retry shortly'))
+    }
+
+    return new Promise((resolve, reject) => {
+      const onAbort = () => {
+        const queue = this.queues[priority]
+        const index = queue.indexOf(waiter)
+        if (index === -1) return
+        queue.splice(index, 1)
+        if (charge) this.settle(charge, 0)
+        reject(signal!.reason)
+      }
+      const waiter: Waiter = {
+        charge,
+        enqueuedAt: now,
+        resolve: release => {
+          signal?.removeEventListener('abort', onAbort)
+          resolve(release)
+        }
+      }
+
+      signal?.addEventListener('abort', onAbort, { once: true })
+      this.queues[priority].push(waiter)
+      this.dispatch()
+    })
+  }
+
+  // True when a new job would have to wait for a slot
+  saturated(): boolean {
+    return this.queued() > 0 || this.running >= this.options.maxConcurrent
+  }
+
+  stats(): SchedulerStats {
+    return {
+      running: this.running,
+      queued: this.queued(),
+      queuedByPriority: {
+        interactive: this.queues.interactive.length,
+        batch: this.queues.batch.length
+      },
+      started: this.started,
+      shed: this.shed,
+      overBudget: this.overBudget,
+      avgWaitMs: this.started ? Math.round(this.totalWaitMs / this.started) : 0,
+      maxWaitMs: this.maxWaitMs
+    }
+  }
+
+  private dispatch() {
+    const now = Date.now()
+    for (const priority of ['interactive', 'batch'] as const) {
+      const queue = this.queues[priority]
+      while (queue.length && this.running < this.options.maxConcurrent) {
+        this.start(queue.shift()!, now)
+      }
+    }
+  }
+
+  private start(waiter: Waiter, now: number) {
+    const waited = now - waiter.enqueuedAt
+    this.running++
+    this.started++
+    this.totalWaitMs += waited
+    this.maxWaitMs = Math.max(this.maxWaitMs, waited)
+
+    let released = false
+    waiter.resolve(usedTokens => {
+      if (released) return
+      released = true
+      if (waiter.charge && usedTokens !== undefined) this.settle(waiter.charge, usedTokens)
+      this.running--
+      this.dispatch()
+    })
+  }
+
+  // The charge when the job fits its key's budget, otherwise when the
+  // window resets; undefined when budgets are off
+  private charge(key: string, tokens: number, now: number): Charge | number | undefined {
+    const limit = this.options.tokensPerMinute
+    if (!limit) return undefined
+
+    let budget = this.budgets.get(key)
+    if (!budget || now - budget.windowStart >= WINDOW_MS) {
+      budget = { windowStart: now, used: 0 }
+      this.budgets.set(key, budget)
+    }
+
+    // A single job larger than the whole budget still runs in an empty window
+    if (budget.used > 0 && budget.used + tokens > limit) {
+      return budget.windowStart + WINDOW_MS
+    }
+
+    budget.used += tokens
+    this.pruneBudgets(now)
+    return { key, windowStart: budget.windowStart, tokens }
+  }
+
+  // Replaces the estimate with actual usage. If the window has rolled over
+  // since, only an underestimate is carried into the new one.
+  private settle(charge: Charge, usedTokens: number) {
+    const budget = this.budgets.get(charge.key)
+    if (!budget) return
+
+    if (budget.windowStart === charge.windowStart) {
+      budget.used = Math.max(0, budget.used + usedTokens - charge.tokens)
+    } else if (usedTokens > charge.tokens) {
+      budget.used += usedTokens - charge.tokens
+    }
+  }
+
+  private pruneBudgets(now: number) {
+    if (this.budgets.size < 1000) return
+    for (const [key, budget] of this.budgets) {
+      if (now - budget.windowStart >= WINDOW_MS) this.budgets.delete(key)
+    }
+  }
+
+  private queued() {
+    return this.queues.interactive.length + this.queues.batch.length
+  }
+}
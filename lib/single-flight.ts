@@ -0,0 +1,69 @@
+export interface SingleFlightStats {
+  inflight: number
+  started: number
+  shared: number
+}
+
+interface Flight<T> {
+  promise: Promise<T>
+  controller: AbortController
+  waiters: number
+}
+
+// Collapses concurrent calls with the same key onto one pending promise. The
+// entry is dropped once it settles, so later calls start a fresh run.
+export class SingleFlight<T> {
+  private pending = new Map<string, Flight<T>>()
+  private started = 0
+  private shared = 0
+
+  // A caller that passes a signal stops waiting when it aborts. The run itself
+  // is only aborted once every caller has stopped waiting.
+  run(key: string, fn: (signal: AbortSignal) => Promise<T>, signal?: AbortSignal): Promise<T> {
+    if (signal?.aborted) return Promise.reject(signal.reason)
+
+    let flight = this.pending.get(key)
+    if (flight) {
+      this.shared++
+    } else {
+      const controller = new AbortController()
+      const started: Flight<T> = {
+        controller,
+        waiters: 0,
+        promise: fn(controller.signal).finally(() => {
+          if (this.pending.get(key) === started) this.pending.delete(key)
+        })
+      }
+      flight = started
+      this.pending.set(key, flight)
+      this.started++
+    }
+
+    flight.waiters++
+    return signal ? this.wait(key, flight, signal) : flight.promise
+  }
+
+  stats(): SingleFlightStats {
+    return {
+      inflight: this.pending.size,
+      started: this.started,
+      shared: this.shared
+    }
+  }
+
+  private wait(key: string, flight: Flight<T>, signal: AbortSignal): Promise<T> {
+    return new Promise<T>((resolve, reject) => {
+      const onAbort = () => {
+        reject(signal.reason)
+        if (--flight.waiters > 0) return
+        // Nobody is left, so later callers start a fresh run
+        if (this.pending.get(key) === flight) this.pending.delete(key)
+        flight.controller.abort(signal.reason)
+      }
+      signal.addEventListener('abort', onAbort, { once: true })
+      flight.promise
+        .then(resolve, reject)
+        .finally(() => signal.removeEventListener('abort', onAbort))
+    })
+  }
+}
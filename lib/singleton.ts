@@ -0,0 +1,12 @@
+// Keeps one instance per process, surviving dev-server module reloads and
+// shared between route handlers that are bundled separately
+export function globalSingleton<T>(name: string, create: () => T): T {
+  const store = globalThis as unknown as Record<string, T | undefined>
+  const key = `__sorena_${name}`
+
+  if (store[key] === undefined) {
+    store[key] = create()
+  }
+
+  return store[key] as T
+}
@@ -0,0 +1,77 @@
+import { Readable, pipeline } from 'stream'
+import { createGzip } from 'zlib'
+import type { GeneratedFiles } from './validation'
+import type { CompressionProfile } from './zip'
+
+type Files = GeneratedFiles['files']
+
+const BLOCK = 512
+
+// One gzip stream over the whole tarball, so repetition across files (the
+// same markup and class names in every page) compresses too, unlike ZIP
+// where each entry starts from an empty dictionary
+const GZIP_LEVELS: Record<CompressionProfile, number> = { fast: 6, max: 9 }
+
+function writeOctal(header: Buffer, value: number, offset: number, length: number) {
+  header.write(value.toString(8).padStart(length - 1, '0') + '\0', offset, length, 'ascii')
+}
+
+// ustar keeps names up to 100 bytes, or 255 when split at a slash into prefix and name
+function splitPath(path: string): [string, string] {
+  if (Buffer.byteLength(path) <= 100) return ['', path]
+
+  for (let i = path.indexOf('/'); i !== -1; i = path.indexOf('/', i + 1)) {
+    const prefix = path.slice(0, i)
+    const name = path.slice(i + 1)
+    if (Buffer.byteLength(prefix) <= 155 && Buffer.byteLength(name) <= 100) return [prefix, name]
+  }
+  throw new Error(`Path too long for tar: ${path}`)
+}
+
+function tarHeader(path: string, size: number, mtime: number): Buffer {
+  const header = Buffer.alloc(BLOCK)
+  const [prefix, name] = splitPath(path)
+
+  header.write(name, 0, 100, 'utf8')
+  writeOctal(header, 0o644, 100, 8)
+  writeOctal(header, 0, 108, 8)
+  writeOctal(header, 0, 116, 8)
+  writeOctal(header, size, 124, 12)
+  writeOctal(header, mtime, 136, 12)
+  // The checksum is computed with its own field read as spaces
+  header.fill(' ', 148, 156)
+  header.write('0', 156, 1, 'ascii')
+  header.write('ustar\0', 257, 6, 'ascii')
+  header.write('00', 263, 2, 'ascii')
+  header.write(prefix, 345, 155, 'utf8')
+
+  let sum = 0
+  for (let i = 0; i < BLOCK; i++) sum += header[i]
+  writeOctal(header, sum, 148, 7)
+  header[155] = 0x20
+  return header
+}
+
+function* tarChunks(files: Files): Generator<Buffer> {
+  const mtime = Math.floor(Date.now() / 1000)
+
+  for (const file of files) {
+    const data = Buffer.from(file.content, 'utf8')
+    yield tarHeader(file.path, data.length, mtime)
+    yield data
+    const padding = (BLOCK - (data.length % BLOCK)) % BLOCK
+    if (padding) yield Buffer.alloc(padding)
+  }
+  // End of archive: two empty blocks
+  yield Buffer.alloc(BLOCK * 2)
+}
+
+// Entries are produced as gzip asks for them, and gzip itself runs on the
+// libuv thread pool, so neither the whole tarball nor the compression sits on
+// the event loop
+export function tarGzStream(files: Files, profile: CompressionProfile = 'fast'): ReadableStream<Uint8Array> {
+  const gzip = createGzip({ level: GZIP_LEVELS[profile] })
+  // pipeline, unlike pipe, forwards a failure in the tar source to gzip
+  pipeline(Readable.from(tarChunks(files), { objectMode: false }), gzip, () => {})
+  return Readable.toWeb(gzip) as ReadableStream<Uint8Array>
+}
@@ -0,0 +1,106 @@
+import { SiteSection } from './validation'
+
+export type Props = Record<string, any>
+
+// Returns the markup for one section; props are the section's props, or the
+// current item inside each()
+export type Renderer = (props: Props, section: SiteSection) => string
+
+type Hole = Renderer | string
+
+// Tagged template compiled once at definition time. Literal text and string
+// holes are merged into static chunks, so a render is one pass of string
+// concatenation alternating static text and function holes.
+export function template(strings: TemplateStringsArray, ...holes: Hole[]): Renderer {
+  const statics: string[] = []
+  const dynamics: Renderer[] = []
+  let text = strings[0]
+
+  holes.forEach((hole, i) => {
+    if (typeof hole === 'string') {
+      text += hole + strings[i + 1]
+      return
+    }
+    statics.push(text)
+    dynamics.push(hole)
+    text = strings[i + 1]
+  })
+
+  const tail = text
+  const count = dynamics.length
+
+  return (props, section) => {
+    let out = ''
+    for (let i = 0; i < count; i++) out += statics[i] + dynamics[i](props, section)
+    return out + tail
+  }
+}
+
+// First truthy prop among names, else the fallback. Without a fallback a
+// missing value prints as-is, like a bare template literal would.
+export function prop(names: string | string[], fallback?: string): Renderer {
+  if (!Array.isArray(names)) {
+    return fallback === undefined
+      ? props => `${props[names]}`
+      : props => props[names] ? `${props[names]}` : fallback
+  }
+
+  return props => {
+    let value
+    for (let i = 0; !value && i < names.length; i++) value = props[names[i]]
+    return fallback === undefined ? `${value}` : value ? `${value}` : fallback
+  }
+}
+
+// The current value itself, for lists of plain strings
+export const value: Renderer = props => `${props}`
+
+export const sectionId: Renderer = (_props, section) => section.id
+
+export const sectionType: Renderer = (_props, section) => section.type
+
+export function when(name: string, body: Renderer): Renderer {
+  return (props, section) => props[name] ? body(props, section) : ''
+}
+
+// Renders body once per entry of the first array prop found among names
+export function each(names: string | string[], body: Renderer): Renderer {
+  const keys = Array.isArray(names) ? names : [names]
+  return (props, section) => {
+    const key = keys.find(k => Array.isArray(props[k]))
+    if (!key) return ''
+
+    const items: Props[] = props[key]
+    let out = ''
+    for (let i = 0; i < items.length; i++) out += body(items[i], section)
+    return out
+  }
+}
+
+// JSON of one prop (defaulting to []) or of all props
+export function json(name?: string, indent?: number): Renderer {
+  return props => JSON.stringify(name ? props[name] || [] : props, null, indent)
+}
+
+// The rendered text as a JSX expression holding a string literal, so quotes,
+// braces and angle brackets in it cannot break the surrounding markup
+export function jsx(body: Renderer): Renderer {
+  return (props, section) => `{${JSON.stringify(body(props, section))}}`
+}
+
+// Section renderers by type, with a fallback for types nobody registered
+export class TemplateRegistry {
+  private templates = new Map<string, Renderer>()
+
+  constructor(private fallback: Renderer) {}
+
+  register(type: string, renderer: Renderer): this {
+    this.templates.set(type, renderer)
+    return this
+  }
+
+  render(section: SiteSection): string {
+    const renderer = this.templates.get(section.type) ?? this.fallback
+    return renderer(section.props, section)
+  }
+}
@@ -19,28 +19,55 @@ export const BuildRequestSchema = z.object({
   }).optional()
 })
 
-export const SitePlanSchema = z.object({
-  meta: z.object({
-    title: z.string(),
-    description: z.string(),
-    language: z.string()
-  }),
-  assets: z.object({
-    images: z.array(z.object({
-      id: z.string(),
-      prompt: z.string().optional(),
-      url: z.string().optional()
-    }))
-  }),
-  sections: z.array(z.object({
+// Many variants of one site in a single call, e.g. several themes or languages
+export const BatchRequestSchema = z.object({
+  requests: z.array(BuildRequestSchema).min(1).max(50)
+})
+
+export const SiteMetaSchema = z.object({
+  title: z.string(),
+  description: z.string(),
+  language: z.string()
+})
+
+export const SiteAssetsSchema = z.object({
+  images: z.array(z.object({
     id: z.string(),
-    type: z.string(),
-    props: z.record(z.any())
-  })),
-  style: z.object({
-    colors: z.record(z.string()),
-    font: z.string().optional()
-  })
+    prompt: z.string().optional(),
+    url: z.string().optional()
+  }))
+})
+
+export const SiteSectionSchema = z.object({
+  id: z.string(),
+  type: z.string(),
+  props: z.record(z.any())
+})
+
+export const SiteStyleSchema = z.object({
+  colors: z.record(z.string()),
+  font: z.string().optional()
+})
+
+export const SitePlanSchema = z.object({
+  meta: SiteMetaSchema,
+  assets: SiteAssetsSchema,
+  sections: z.array(SiteSectionSchema),
+  style: SiteStyleSchema
+})
+
+// Rewrites one section of an existing plan following a short instruction
+export const SectionEditRequestSchema = z.object({
+  // The project being edited: its stored plan and files are the base revision
+  projectId: z.string().optional(),
+  // Only needed once the project has expired from the server's store
+  plan: SitePlanSchema.optional(),
+  sectionId: z.string(),
+  instruction: z.string().min(3, "Instruction must be at least 3 characters").max(2000),
+  framework: BuildRequestSchema.shape.framework
+}).refine(data => data.projectId || data.plan, {
+  message: "Either projectId or plan is required",
+  path: ["plan"]
 })
 
 export const GeneratedFilesSchema = z.object({
@@ -50,6 +77,16 @@ export const GeneratedFilesSchema = z.object({
   }))
 })
 
+// Either the id of a stored project or the files themselves
+export const ExportRequestSchema = z.union([
+  z.object({ projectId: z.string() }),
+  GeneratedFilesSchema
+])
+
 export type BuildRequest = z.infer<typeof BuildRequestSchema>
+export type BatchRequest = z.infer<typeof BatchRequestSchema>
 export type SitePlan = z.infer<typeof SitePlanSchema>
-export type GeneratedFiles = z.infer<typeof GeneratedFilesSchema>
\ No newline at end of file
+export type SiteSection = z.infer<typeof SiteSectionSchema>
+export type SectionEditRequest = z.infer<typeof SectionEditRequestSchema>
+export type GeneratedFiles = z.infer<typeof GeneratedFilesSchema>
+export type ExportRequest = z.infer<typeof ExportRequestSchema>
\ No newline at end of file
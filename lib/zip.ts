@@ -1,18 +1,192 @@
-import JSZip from 'jszip'
-import { GeneratedFiles } from './validation'
-
-export async function zipFiles(files: GeneratedFiles['files']): Promise<Buffer> {
-  const zip = new JSZip()
-  
-  files.forEach(file => {
-    zip.file(file.path, file.content)
-  })
-  
-  const buffer = await zip.generateAsync({ 
-    type: 'nodebuffer',
-    compression: 'DEFLATE',
-    compressionOptions: { level: 9 }
+import type { GeneratedFiles } from './validation'
+import { type CompressedEntry, compressionPool } from './compression-pool'
+import { LruCache } from './cache'
+import { globalSingleton } from './singleton'
+
+type Files = GeneratedFiles['files']
+
+const LOCAL_HEADER = 0x04034b50
+const CENTRAL_HEADER = 0x02014b50
+const END_OF_CENTRAL_DIRECTORY = 0x06054b50
+const VERSION = 20
+// Bit 11: file names are UTF-8
+const UTF8_FLAG = 0x0800
+const METHOD_STORE = 0
+const METHOD_DEFLATE = 8
+
+// 'fast' suits downloads someone is waiting on. On source text level 2 comes
+// within about 6% of level 9's size at under half the CPU for large entries;
+// for entries of a few KB the level makes little difference either way.
+export type CompressionProfile = 'fast' | 'max'
+
+const PROFILE_LEVELS: Record<CompressionProfile, number> = { fast: 2, max: 9 }
+
+// Below this many bytes headers and block overhead eat any saving
+const STORE_BELOW_BYTES = 128
+
+// Formats that are compressed already
+const STORED_EXTENSIONS = new Set([
+  'png', 'jpg', 'jpeg', 'gif', 'webp', 'avif', 'ico',
+  'woff', 'woff2', 'ttf', 'otf', 'eot',
+  'mp3', 'mp4', 'webm', 'ogg', 'pdf', 'zip', 'gz', 'br'
+])
+
+export function parseCompressionProfile(value: string | null | undefined): CompressionProfile {
+  return value === 'max' ? 'max' : 'fast'
+}
+
+// 0 stores the entry; the worker may still store others that do not compress
+export function compressionLevel(path: string, content: string, profile: CompressionProfile): number {
+  const extension = path.slice(path.lastIndexOf('.') + 1).toLowerCase()
+  if (STORED_EXTENSIONS.has(extension) || content.length < STORE_BELOW_BYTES) return 0
+  return PROFILE_LEVELS[profile]
+}
+
+// Compressed entries keyed by level and content hash, so an archive that
+// differs from an earlier one in a single file only compresses that file. Paths are
+// not part of the key: they live in the headers, not the compressed data.
+const entryCache = globalSingleton('zipEntries', () => new LruCache<CompressedEntry>({
+  maxEntries: Number(process.env.ZIP_ENTRY_CACHE_MAX_ENTRIES) || 10000,
+  maxBytes: Number(process.env.ZIP_ENTRY_CACHE_MAX_BYTES) || 64 * 1024 * 1024
+}))
+
+async function compressEntry(content: string, level: number, digest: string): Promise<CompressedEntry> {
+  const key = `${level}:${digest}`
+  const cached = entryCache.get(key)
+  if (cached) return cached
+
+  const entry = await compressionPool.compress(content, level)
+  entryCache.set(key, entry, entry.body.length)
+  return entry
+}
+
+interface Entry {
+  name: Buffer
+  crc: number
+  method: number
+  compressedSize: number
+  size: number
+  offset: number
+}
+
+// MS-DOS date and time fields, local time at two-second resolution
+function dosDateTime(date: Date) {
+  return {
+    time: (date.getHours() << 11) | (date.getMinutes() << 5) | (date.getSeconds() >> 1),
+    date: ((date.getFullYear() - 1980) << 9) | ((date.getMonth() + 1) << 5) | date.getDate()
+  }
+}
+
+function localHeader(entry: Entry, stamp: { time: number; date: number }): Buffer {
+  const header = Buffer.alloc(30)
+  header.writeUInt32LE(LOCAL_HEADER, 0)
+  header.writeUInt16LE(VERSION, 4)
+  header.writeUInt16LE(UTF8_FLAG, 6)
+  header.writeUInt16LE(entry.method, 8)
+  header.writeUInt16LE(stamp.time, 10)
+  header.writeUInt16LE(stamp.date, 12)
+  header.writeUInt32LE(entry.crc, 14)
+  header.writeUInt32LE(entry.compressedSize, 18)
+  header.writeUInt32LE(entry.size, 22)
+  header.writeUInt16LE(entry.name.length, 26)
+  header.writeUInt16LE(0, 28)
+  return Buffer.concat([header, entry.name])
+}
+
+function centralHeader(entry: Entry, stamp: { time: number; date: number }): Buffer {
+  const header = Buffer.alloc(46)
+  header.writeUInt32LE(CENTRAL_HEADER, 0)
+  header.writeUInt16LE(VERSION, 4)
+  header.writeUInt16LE(VERSION, 6)
+  header.writeUInt16LE(UTF8_FLAG, 8)
+  header.writeUInt16LE(entry.method, 10)
+  header.writeUInt16LE(stamp.time, 12)
+  header.writeUInt16LE(stamp.date, 14)
+  header.writeUInt32LE(entry.crc, 16)
+  header.writeUInt32LE(entry.compressedSize, 20)
+  header.writeUInt32LE(entry.size, 24)
+  header.writeUInt16LE(entry.name.length, 28)
+  // Extra field, comment, disk number and internal attributes stay zero
+  header.writeUInt32LE(0, 38)
+  header.writeUInt32LE(entry.offset, 42)
+  return Buffer.concat([header, entry.name])
+}
+
+function endOfCentralDirectory(count: number, size: number, offset: number): Buffer {
+  const record = Buffer.alloc(22)
+  record.writeUInt32LE(END_OF_CENTRAL_DIRECTORY, 0)
+  record.writeUInt16LE(count, 8)
+  record.writeUInt16LE(count, 10)
+  record.writeUInt32LE(size, 12)
+  record.writeUInt32LE(offset, 16)
+  return record
+}
+
+// Writes the archive entry by entry as the consumer reads it. Entries are
+// compressed on the worker pool, a few ahead of the one being written so the
+// workers stay busy, and each is emitted with its local header as soon as it
+// is its turn; the first bytes leave before the later files are compressed.
+// Sizes are known before each header is written, so no data descriptors are
+// needed. Archives are plain ZIP, not ZIP64. digests (sha256 of each file's
+// content) key the entry cache; without them the pool hashes the files first.
+export function zipStream(
+  files: Files,
+  profile: CompressionProfile = 'fast',
+  digests?: string[]
+): ReadableStream<Uint8Array> {
+  const stamp = dosDateTime(new Date())
+  const entries: Entry[] = []
+  const pending: Promise<CompressedEntry>[] = []
+  const lookahead = compressionPool.size * 2
+  let offset = 0
+  let next = 0
+  let keys: Promise<string[]> | undefined
+
+  const schedule = () => {
+    while (pending.length < lookahead && next + pending.length < files.length) {
+      keys ??= digests ? Promise.resolve(digests) : compressionPool.digest(files.map(file => file.content))
+      const index = next + pending.length
+      const file = files[index]
+      const level = compressionLevel(file.path, file.content, profile)
+      const task = keys.then(all => compressEntry(file.content, level, all[index]))
+      // Awaited in order below; this only keeps early failures from going unhandled
+      task.catch(() => {})
+      pending.push(task)
+    }
+  }
+
+  return new ReadableStream<Uint8Array>({
+    async pull(controller) {
+      if (next < files.length) {
+        schedule()
+        const file = files[next++]
+        const { body, stored, crc, size } = await pending.shift()!
+        schedule()
+
+        const entry: Entry = {
+          name: Buffer.from(file.path, 'utf8'),
+          crc,
+          method: stored ? METHOD_STORE : METHOD_DEFLATE,
+          compressedSize: body.length,
+          size,
+          offset
+        }
+        if (offset + body.length > 0xffffffff || entries.length >= 0xffff) {
+          throw new Error('Archive is too large for ZIP without ZIP64')
+        }
+
+        const header = localHeader(entry, stamp)
+        entries.push(entry)
+        offset += header.length + body.length
+        controller.enqueue(header)
+        controller.enqueue(body)
+        return
+      }
+
+      const directory = Buffer.concat(entries.map(entry => centralHeader(entry, stamp)))
+      controller.enqueue(directory)
+      controller.enqueue(endOfCentralDirectory(entries.length, directory.length, offset))
+      controller.close()
+    }
   })
-  
-  return buffer as Buffer
-}
\ No newline at end of file
+}
@@ -1,6 +1,39 @@
+import { copyFileSync, existsSync, mkdirSync } from 'fs'
+import { createRequire } from 'module'
+import path from 'path'
+import { fileURLToPath } from 'url'
+
+const require = createRequire(import.meta.url)
+
+// The preview worker loads the TypeScript compiler from this app's origin,
+// not a CDN, so React and Next previews work offline and under a same-origin
+// CSP. The copy is named after the installed version, so it can be cached
+// for good and never goes stale.
+const typescriptFile = `typescript-${require('typescript/package.json').version}.js`
+const vendorDir = path.join(path.dirname(fileURLToPath(import.meta.url)), 'public', 'vendor')
+if (!existsSync(path.join(vendorDir, typescriptFile))) {
+  mkdirSync(vendorDir, { recursive: true })
+  copyFileSync(require.resolve('typescript/lib/typescript.js'), path.join(vendorDir, typescriptFile))
+}
+
 /** @type {import('next').NextConfig} */
 const nextConfig = {
   reactStrictMode: true,
+
+  // Inlined into client code, including the preview bundler worker
+  env: {
+    TYPESCRIPT_URL: `/vendor/${typescriptFile}`,
+  },
+
+  // Vendored files carry their version in the name
+  async headers() {
+    return [
+      {
+        source: '/vendor/:file*',
+        headers: [{ key: 'Cache-Control', value: 'public, max-age=31536000, immutable' }],
+      },
+    ]
+  },
   
   // Completely disable SWC tracing
   experimental: {
@@ -0,0 +1,140 @@
+// Serves generated files to the preview iframe at /preview-fs/<revision>/<path>,
+// so pages load their stylesheets, scripts and other pages by relative URL.
+//
+// Files live in Cache Storage once per content hash and each revision is a
+// manifest of path -> hash, so a new revision only stores the files that
+// changed, and everything survives the browser stopping this worker.
+
+const CACHE = 'preview-fs-v1'
+const SCOPE = new URL('./preview-fs/', self.location).pathname
+// Cache keys, outside the revision/path layout that fetches use
+const BLOB_PREFIX = `${SCOPE}__blob/`
+const MANIFEST_PREFIX = `${SCOPE}__manifest/`
+const REVISIONS_KEY = `${SCOPE}__revisions`
+const MAX_REVISIONS = 10
+
+const CONTENT_TYPES = {
+  html: 'text/html; charset=utf-8',
+  css: 'text/css; charset=utf-8',
+  js: 'text/javascript; charset=utf-8',
+  mjs: 'text/javascript; charset=utf-8',
+  jsx: 'text/javascript; charset=utf-8',
+  ts: 'text/javascript; charset=utf-8',
+  tsx: 'text/javascript; charset=utf-8',
+  json: 'application/json; charset=utf-8',
+  svg: 'image/svg+xml',
+  txt: 'text/plain; charset=utf-8',
+  md: 'text/markdown; charset=utf-8'
+}
+
+// Hot copies of recently used manifests; Cache Storage is the durable one
+const manifests = new Map()
+// Publishes update the revision list, so they run one at a time
+let publishing = Promise.resolve()
+
+self.addEventListener('install', () => self.skipWaiting())
+
+self.addEventListener('activate', event => event.waitUntil(self.clients.claim()))
+
+self.addEventListener('message', event => {
+  if (event.data?.type !== 'publish') return
+
+  const port = event.ports[0]
+  const work = publishing.then(() => publish(event.data.files))
+  publishing = work.catch(() => {})
+
+  event.waitUntil(work.then(
+    revision => port.postMessage({ revision }),
+    error => port.postMessage({ error: error.message || 'Failed to publish preview files' })
+  ))
+})
+
+self.addEventListener('fetch', event => {
+  const url = new URL(event.request.url)
+  if (url.origin !== self.location.origin || !url.pathname.startsWith(SCOPE)) return
+  event.respondWith(serve(url.pathname.slice(SCOPE.length)))
+})
+
+async function sha256(text) {
+  const digest = await crypto.subtle.digest('SHA-256', new TextEncoder().encode(text))
+  return Array.from(new Uint8Array(digest), byte => byte.toString(16).padStart(2, '0')).join('')
+}
+
+function contentType(path) {
+  return CONTENT_TYPES[path.slice(path.lastIndexOf('.') + 1).toLowerCase()] || 'application/octet-stream'
+}
+
+async function publish(files) {
+  const cache = await caches.open(CACHE)
+  const manifest = {}
+
+  await Promise.all(files.map(async file => {
+    const hash = await sha256(file.content)
+    manifest[file.path] = hash
+    if (!(await cache.match(BLOB_PREFIX + hash))) {
+      await cache.put(BLOB_PREFIX + hash, new Response(file.content))
+    }
+  }))
+
+  // The same files always make the same revision, whatever their order
+  const entries = Object.keys(manifest).sort().map(path => [path, manifest[path]])
+  const revision = (await sha256(JSON.stringify(entries))).slice(0, 16)
+
+  manifests.set(revision, manifest)
+  await cache.put(MANIFEST_PREFIX + revision, Response.json(manifest))
+  await retire(cache, revision)
+  return revision
+}
+
+// Keeps the most recent revisions and drops files none of them use
+async function retire(cache, latest) {
+  const stored = await cache.match(REVISIONS_KEY)
+  const previous = stored ? await stored.json() : []
+  const revisions = previous.filter(revision => revision !== latest).concat(latest)
+  const dropped = revisions.splice(0, Math.max(0, revisions.length - MAX_REVISIONS))
+  await cache.put(REVISIONS_KEY, Response.json(revisions))
+  if (!dropped.length) return
+
+  for (const revision of dropped) {
+    manifests.delete(revision)
+    await cache.delete(MANIFEST_PREFIX + revision)
+  }
+
+  const live = new Set()
+  for (const revision of revisions) {
+    const manifest = await loadManifest(cache, revision)
+    if (manifest) Object.values(manifest).forEach(hash => live.add(hash))
+  }
+  for (const request of await cache.keys()) {
+    const { pathname } = new URL(request.url)
+    if (pathname.startsWith(BLOB_PREFIX) && !live.has(pathname.slice(BLOB_PREFIX.length))) {
+      await cache.delete(request)
+    }
+  }
+}
+
+async function loadManifest(cache, revision) {
+  if (manifests.has(revision)) return manifests.get(revision)
+
+  const stored = await cache.match(MANIFEST_PREFIX + revision)
+  if (!stored) return undefined
+  const manifest = await stored.json()
+  manifests.set(revision, manifest)
+  return manifest
+}
+
+async function serve(rest) {
+  const slash = rest.indexOf('/')
+  const revision = slash === -1 ? rest : rest.slice(0, slash)
+  let path = slash === -1 ? '' : decodeURIComponent(rest.slice(slash + 1))
+  if (path === '' || path.endsWith('/')) path += 'index.html'
+
+  const cache = await caches.open(CACHE)
+  const hash = (await loadManifest(cache, revision))?.[path]
+  const stored = hash && await cache.match(BLOB_PREFIX + hash)
+  if (!stored) return new Response('Not found', { status: 404 })
+
+  return new Response(stored.body, {
+    headers: { 'Content-Type': contentType(path), ETag: `"${hash}"` }
+  })
+}
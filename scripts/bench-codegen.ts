@@ -0,0 +1,22 @@
+import { buildFilesFromPlan } from '../lib/codegen'
+import { buildFilesFromPlan as legacy } from './legacy-codegen'
+import { bench, report, samplePlan } from './bench-utils'
+
+// The compiled template engine against the codegen it replaced: a switch per
+// section with nested template literals, frozen in legacy-codegen.ts. Builds
+// pass no revisions, so the fragment cache stays out of the measurement.
+
+async function main() {
+  for (const sectionCount of [7, 50, 200]) {
+    const plan = await samplePlan(sectionCount)
+
+    for (const framework of ['vanilla', 'react', 'next'] as const) {
+      report(`${framework}, ${sectionCount} sections`, [
+        bench('switch + template literals', () => legacy(plan, framework)),
+        bench('compiled templates', () => buildFilesFromPlan(plan, framework))
+      ])
+    }
+  }
+}
+
+main()
@@ -0,0 +1,84 @@
+import { readdirSync, readFileSync } from 'fs'
+import path from 'path'
+import { GeneratedFiles } from '../lib/validation'
+import { buildFilesFromPlan } from '../lib/codegen'
+import { CompressionProfile, zipStream } from '../lib/zip'
+import { tarGzStream } from '../lib/tar'
+import { canInlineHtml, singleFileHtml } from '../lib/html-bundle'
+import { BenchResult, benchAsync, report, samplePlan } from './bench-utils'
+
+// Size and time of each export format against ZIP, for a generated site, a
+// set of larger source files and many near-identical pages. Every timed run
+// changes each file slightly, so ZIP is measured without its entry cache,
+// except in the row that says otherwise.
+
+type Files = GeneratedFiles['files']
+
+const ITERATIONS = 30
+
+async function bytes(stream: ReadableStream<Uint8Array>): Promise<number> {
+  return (await new Response(stream).arrayBuffer()).byteLength
+}
+
+const formats: Array<{ name: string; build: (files: Files) => Promise<number> }> = [
+  ...(['fast', 'max'] as CompressionProfile[]).map(profile => ({
+    name: `zip ${profile}`,
+    build: (files: Files) => bytes(zipStream(files, profile))
+  })),
+  ...(['fast', 'max'] as CompressionProfile[]).map(profile => ({
+    name: `tar.gz ${profile}`,
+    build: (files: Files) => bytes(tarGzStream(files, profile))
+  })),
+  {
+    name: 'html',
+    build: async (files: Files) => Buffer.byteLength(singleFileHtml(files)!)
+  }
+]
+
+function edited(files: Files, run: number): Files {
+  return files.map(file => ({ path: file.path, content: `${file.content}\n${run}` }))
+}
+
+async function compare(title: string, files: Files) {
+  const applicable = formats.filter(format => format.name !== 'html' || canInlineHtml(files))
+  const raw = files.reduce((sum, file) => sum + Buffer.byteLength(file.content), 0)
+
+  const sizes = await Promise.all(applicable.map(format => format.build(files)))
+  const zip = sizes[0]
+  console.log(`\n${title}: ${files.length} files, ${(raw / 1024).toFixed(1)} KB`)
+  console.table(applicable.map((format, i) => ({
+    format: format.name,
+    KB: (sizes[i] / 1024).toFixed(1),
+    'vs zip fast': `${(100 * sizes[i] / zip).toFixed(1)}%`
+  })))
+
+  const results: BenchResult[] = []
+  for (const format of applicable) {
+    let run = 0
+    results.push(await benchAsync(format.name, () => format.build(edited(files, run++)), ITERATIONS))
+  }
+  results.push(await benchAsync('zip fast, entries cached', () => formats[0].build(files), ITERATIONS))
+  report(`${title}, time per export`, results)
+}
+
+async function main() {
+  const site = buildFilesFromPlan(await samplePlan(7), 'vanilla').files
+
+  const libDir = path.join(process.cwd(), 'lib')
+  const sources = readdirSync(libDir)
+    .filter(name => name.endsWith('.ts'))
+    .map(name => ({ path: `lib/${name}`, content: readFileSync(path.join(libDir, name), 'utf8') }))
+
+  // The same page many times over, as a multi-page site repeats its layout
+  const page = site.find(file => file.path === 'index.html')!.content
+  const pages = Array.from({ length: 60 }, (_, i) => ({
+    path: `pages/page-${i + 1}.html`,
+    content: page.replace(/<title>[^<]*<\/title>/, `<title>Page ${i + 1}</title>`)
+  }))
+
+  await compare('Generated vanilla site, 7 sections', site)
+  await compare("This repository's lib/*.ts", sources)
+  await compare('60 near-identical pages', pages)
+}
+
+main()
@@ -0,0 +1,46 @@
+import { BuildRequest, SitePlan } from '../lib/validation'
+import { buildFilesFromPlan, getFragmentCacheStats, newRevision, sectionRevisions } from '../lib/codegen'
+import { bench, report, samplePlan } from './bench-utils'
+
+// Rebuilding a project after one-section edits, as the regenerate route does:
+// with revisions only the edited section misses the fragment cache, without
+// them every section is rendered again
+
+const EDITS = 500
+
+function editSession(plan: SitePlan, framework: BuildRequest['framework'], cached: boolean) {
+  let current = plan
+  let revisions = sectionRevisions(plan)
+  let edit = 0
+  buildFilesFromPlan(current, framework, cached ? revisions : undefined)
+
+  return () => {
+    const index = edit++ % current.sections.length
+    const sections = current.sections.slice()
+    sections[index] = { ...sections[index], props: { ...sections[index].props, title: `Edit ${edit}` } }
+    current = { ...current, sections }
+    revisions = revisions.slice()
+    revisions[index] = newRevision()
+    return buildFilesFromPlan(current, framework, cached ? revisions : undefined)
+  }
+}
+
+async function main() {
+  for (const sectionCount of [7, 50]) {
+    const plan = await samplePlan(sectionCount)
+
+    for (const framework of ['vanilla', 'react', 'next'] as const) {
+      const before = getFragmentCacheStats()
+      const cached = bench('revisions (cached)', editSession(plan, framework, true), EDITS)
+      const after = getFragmentCacheStats()
+      const uncached = bench('no revisions', editSession(plan, framework, false), EDITS)
+
+      const hits = after.hits - before.hits
+      const lookups = hits + after.misses - before.misses
+      report(`${framework}, ${sectionCount} sections, one section edited per build`, [cached, uncached])
+      console.log(`fragment cache hit rate ${(100 * hits / lookups).toFixed(1)}% (${hits}/${lookups} lookups)`)
+    }
+  }
+}
+
+main()
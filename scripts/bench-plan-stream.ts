@@ -0,0 +1,48 @@
+import { SitePlanSchema } from '../lib/validation'
+import { PlanStreamParser } from '../lib/plan-stream'
+import { bench, report, samplePlan } from './bench-utils'
+
+// PlanStreamParser against buffering the whole response and parsing it once,
+// on plans cut into deltas the size the model streams them in
+
+const CHUNK_SIZE = 64
+
+function chunks(text: string): string[] {
+  const out: string[] = []
+  for (let i = 0; i < text.length; i += CHUNK_SIZE) out.push(text.slice(i, i + CHUNK_SIZE))
+  return out
+}
+
+async function main() {
+  for (const sectionCount of [7, 50, 200]) {
+    const json = JSON.stringify(await samplePlan(sectionCount), null, 2)
+    const deltas = chunks(json)
+
+    const results = [
+      bench('buffer + JSON.parse', () => {
+        let text = ''
+        for (const delta of deltas) text += delta
+        return SitePlanSchema.parse(JSON.parse(text))
+      }),
+      bench('PlanStreamParser', () => {
+        const parser = new PlanStreamParser()
+        for (const delta of deltas) parser.push(delta)
+        return parser.end()
+      })
+    ]
+
+    // How much of the response has arrived when the first section can render;
+    // buffering has to wait for all of it
+    const parser = new PlanStreamParser()
+    let received = 0
+    for (const delta of deltas) {
+      received += delta.length
+      if (parser.push(delta).some(event => event.type === 'section')) break
+    }
+
+    report(`${sectionCount} sections, ${(json.length / 1024).toFixed(1)} KiB in ${deltas.length} deltas`, results)
+    console.log(`first section event after ${(100 * received / json.length).toFixed(1)}% of the input`)
+  }
+}
+
+main()
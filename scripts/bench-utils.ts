@@ -0,0 +1,86 @@
+import { performance } from 'perf_hooks'
+import { BuildRequest, SitePlan } from '../lib/validation'
+import { LocalProvider } from '../lib/local-provider'
+
+// Shared by the scripts/bench-*.ts benchmarks. Run one with
+//   npx tsx scripts/bench-<name>.ts
+// from the repository root.
+
+const SECTION_TYPES: BuildRequest['sections'] = ['hero', 'features', 'menu', 'gallery', 'pricing', 'faq', 'contact']
+
+export function sampleRequest(sectionCount: number, framework: BuildRequest['framework'] = 'vanilla'): BuildRequest {
+  return {
+    intent: 'A neighbourhood bakery with fresh bread, cakes and a small cafe',
+    framework,
+    theme: { primary: '#6B46C1', secondary: '#EC4899', font: 'Inter', dark: false },
+    sections: Array.from({ length: sectionCount }, (_, i) => SECTION_TYPES[i % SECTION_TYPES.length]),
+    language: 'en',
+    brand: { name: 'Crumb & Co', tone: 'casual' }
+  }
+}
+
+// A plan as the offline stand-in model writes it, so benchmarks need no API key
+export async function samplePlan(sectionCount: number): Promise<SitePlan> {
+  const json = await new LocalProvider().complete({
+    messages: [],
+    temperature: 0,
+    task: { kind: 'plan', request: sampleRequest(sectionCount) }
+  })
+  return JSON.parse(json)
+}
+
+export interface BenchResult {
+  name: string
+  meanMs: number
+  p50Ms: number
+  p95Ms: number
+}
+
+// Times fn over `iterations` runs after a warm-up so the JIT has settled
+export function bench(name: string, fn: () => unknown, iterations = 200): BenchResult {
+  for (let i = 0; i < Math.min(20, iterations); i++) fn()
+
+  const times: number[] = []
+  for (let i = 0; i < iterations; i++) {
+    const start = performance.now()
+    fn()
+    times.push(performance.now() - start)
+  }
+
+  return summarize(name, times)
+}
+
+// As bench, for work that finishes asynchronously (worker threads, streams).
+// Runs one at a time, so each timing is a single call end to end.
+export async function benchAsync(name: string, fn: () => Promise<unknown>, iterations = 50): Promise<BenchResult> {
+  for (let i = 0; i < Math.min(5, iterations); i++) await fn()
+
+  const times: number[] = []
+  for (let i = 0; i < iterations; i++) {
+    const start = performance.now()
+    await fn()
+    times.push(performance.now() - start)
+  }
+
+  return summarize(name, times)
+}
+
+function summarize(name: string, times: number[]): BenchResult {
+  times.sort((a, b) => a - b)
+  return {
+    name,
+    meanMs: times.reduce((sum, t) => sum + t, 0) / times.length,
+    p50Ms: times[Math.floor(times.length * 0.5)],
+    p95Ms: times[Math.floor(times.length * 0.95)]
+  }
+}
+
+export function report(title: string, results: BenchResult[]) {
+  console.log(`\n${title}`)
+  console.table(results.map(r => ({
+    name: r.name,
+    'mean ms': r.meanMs.toFixed(3),
+    'p50 ms': r.p50Ms.toFixed(3),
+    'p95 ms': r.p95Ms.toFixed(3)
+  })))
+}
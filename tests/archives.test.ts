@@ -0,0 +1,137 @@
+import { test } from 'node:test'
+import assert from 'node:assert/strict'
+import { createHash } from 'crypto'
+import { crc32, gunzipSync, inflateRawSync } from 'zlib'
+import { tarGzStream } from '../lib/tar.ts'
+import { zipStream } from '../lib/zip.ts'
+
+// Writes archives with lib/zip.ts and lib/tar.ts and reads them back with
+// small readers that follow the formats, not the writers
+
+type Files = Array<{ path: string; content: string }>
+
+interface ZipEntry {
+  path: string
+  content: string
+  method: number
+}
+
+const FILES: Files = [
+  { path: 'index.html', content: '<!DOCTYPE html>\n<html><body>' + '<p>Fresh bread daily</p>\n'.repeat(200) + '</body></html>' },
+  { path: 'styles.css', content: 'body { margin: 0; font-family: Inter, sans-serif; }\n'.repeat(50) },
+  // Too small to be worth deflating, so it is stored
+  { path: 'main.js', content: 'console.log("hi")' },
+  { path: 'empty.txt', content: '' },
+  // Stored by extension
+  { path: 'images/logo.png', content: Array.from({ length: 600 }, (_, i) => String.fromCharCode(33 + ((i * 7919) % 90))).join('') },
+  { path: 'pages/menü/café.html', content: '<h1>Café ☕ — crème brûlée</h1>\n'.repeat(20) },
+  // Over tar's 100-byte name field, so split into prefix and name
+  { path: `src/${'components/'.repeat(12)}Hero.jsx`, content: 'export default function Hero() { return null }\n' }
+]
+
+async function read(stream: ReadableStream<Uint8Array>): Promise<Buffer> {
+  return Buffer.from(await new Response(stream).arrayBuffer())
+}
+
+// Walks the central directory, as unzip does, and checks each entry's local
+// header, method and CRC against it
+function unzip(archive: Buffer): ZipEntry[] {
+  const end = archive.lastIndexOf(Buffer.from([0x50, 0x4b, 0x05, 0x06]))
+  assert.ok(end >= 0, 'end of central directory record')
+  const count = archive.readUInt16LE(end + 10)
+  let position = archive.readUInt32LE(end + 16)
+  assert.equal(position + archive.readUInt32LE(end + 12), end, 'central directory ends at the end record')
+
+  const entries: ZipEntry[] = []
+  for (let i = 0; i < count; i++) {
+    assert.equal(archive.readUInt32LE(position), 0x02014b50, 'central header signature')
+    const method = archive.readUInt16LE(position + 10)
+    const crc = archive.readUInt32LE(position + 16)
+    const compressedSize = archive.readUInt32LE(position + 20)
+    const size = archive.readUInt32LE(position + 24)
+    const nameLength = archive.readUInt16LE(position + 28)
+    const extraLength = archive.readUInt16LE(position + 30)
+    const commentLength = archive.readUInt16LE(position + 32)
+    const offset = archive.readUInt32LE(position + 42)
+    const name = archive.subarray(position + 46, position + 46 + nameLength).toString('utf8')
+    position += 46 + nameLength + extraLength + commentLength
+
+    assert.equal(archive.readUInt32LE(offset), 0x04034b50, `local header of ${name}`)
+    assert.equal(archive.readUInt16LE(offset + 8), method, `method of ${name}`)
+    assert.equal(archive.readUInt32LE(offset + 14), crc, `local CRC of ${name}`)
+    const start = offset + 30 + archive.readUInt16LE(offset + 26) + archive.readUInt16LE(offset + 28)
+    const raw = archive.subarray(start, start + compressedSize)
+    assert.ok(method === 0 || method === 8, `method of ${name}`)
+    const data = method === 8 ? inflateRawSync(raw) : raw
+
+    assert.equal(data.length, size, `size of ${name}`)
+    assert.equal(crc32(data), crc, `CRC of ${name}`)
+    entries.push({ path: name, content: data.toString('utf8'), method })
+  }
+  return entries
+}
+
+function contents(entries: ZipEntry[]): Files {
+  return entries.map(({ path, content }) => ({ path, content }))
+}
+
+function octal(block: Buffer, offset: number, length: number) {
+  return parseInt(block.subarray(offset, offset + length).toString('ascii').replace(/\0.*$/, '').trim() || '0', 8)
+}
+
+function text(block: Buffer, offset: number, length: number) {
+  const field = block.subarray(offset, offset + length)
+  const end = field.indexOf(0)
+  return field.subarray(0, end === -1 ? length : end).toString('utf8')
+}
+
+// ustar: 512-byte headers with checksums, padded data, two empty blocks at the end
+function untar(archive: Buffer): Files {
+  const files: Files = []
+  let position = 0
+
+  for (;;) {
+    const header = archive.subarray(position, position + 512)
+    assert.equal(header.length, 512, 'archive ends with two empty blocks')
+    if (header.every(byte => byte === 0)) {
+      assert.ok(archive.subarray(position + 512, position + 1024).every(byte => byte === 0), 'second end block')
+      return files
+    }
+
+    let sum = 0
+    for (let i = 0; i < 512; i++) sum += i >= 148 && i < 156 ? 0x20 : header[i]
+    assert.equal(octal(header, 148, 8), sum, 'header checksum')
+    assert.equal(text(header, 257, 6), 'ustar', 'ustar magic')
+
+    const prefix = text(header, 345, 155)
+    const name = text(header, 0, 100)
+    const size = octal(header, 124, 12)
+    const start = position + 512
+    files.push({ path: prefix ? `${prefix}/${name}` : name, content: archive.subarray(start, start + size).toString('utf8') })
+    position = start + Math.ceil(size / 512) * 512
+  }
+}
+
+for (const profile of ['fast', 'max'] as const) {
+  test(`zip round-trips every file (${profile})`, async () => {
+    assert.deepEqual(contents(unzip(await read(zipStream(FILES, profile)))), FILES)
+  })
+
+  test(`tar.gz round-trips every file (${profile})`, async () => {
+    assert.deepEqual(untar(gunzipSync(await read(tarGzStream(FILES, profile)))), FILES)
+  })
+}
+
+test('zip stores small and already-compressed entries', async () => {
+  const entries = unzip(await read(zipStream(FILES)))
+  const methods = new Map(entries.map(entry => [entry.path, entry.method]))
+
+  assert.equal(methods.get('index.html'), 8)
+  assert.equal(methods.get('main.js'), 0)
+  assert.equal(methods.get('images/logo.png'), 0)
+})
+
+test('given digests key the entry cache without changing the archive', async () => {
+  const digests = FILES.map(file => createHash('sha256').update(file.content).digest('hex'))
+  assert.deepEqual(contents(unzip(await read(zipStream(FILES, 'fast', digests)))), FILES)
+})
@@ -0,0 +1,97 @@
+import { test } from 'node:test'
+import assert from 'node:assert/strict'
+import { readFileSync } from 'fs'
+import path from 'path'
+import vm from 'vm'
+
+// Runs public/preview-sw.js against an in-memory Cache Storage and drives it
+// through its message and fetch events, as the browser would
+
+const ORIGIN = 'http://localhost'
+
+function loadWorker() {
+  const store = new Map<string, Response>()
+  const key = (request: string | { url: string }) =>
+    new URL(typeof request === 'string' ? request : request.url, ORIGIN).href
+  const cache = {
+    async match(request: string | { url: string }) {
+      return store.get(key(request))?.clone()
+    },
+    async put(request: string, response: Response) {
+      store.set(key(request), response.clone())
+    },
+    async delete(request: string | { url: string }) {
+      return store.delete(key(request))
+    },
+    async keys() {
+      return [...store.keys()].map(url => ({ url }))
+    }
+  }
+
+  const listeners: Record<string, (event: any) => void> = {}
+  const self = {
+    location: new URL('/preview-sw.js', ORIGIN),
+    addEventListener: (type: string, listener: (event: any) => void) => { listeners[type] = listener },
+    skipWaiting() {},
+    clients: { claim() {} }
+  }
+  const source = readFileSync(path.join(process.cwd(), 'public/preview-sw.js'), 'utf8')
+  vm.runInNewContext(source, { self, caches: { open: async () => cache }, crypto, Response, URL, TextEncoder })
+
+  const publish = (files: Array<{ path: string; content: string }>) =>
+    new Promise<any>(resolve => {
+      listeners.message({ data: { type: 'publish', files }, ports: [{ postMessage: resolve }], waitUntil() {} })
+    })
+
+  const fetch = (pathname: string) =>
+    new Promise<{ status: number; type: string | null; body: string }>(resolve => {
+      listeners.fetch({
+        request: { url: ORIGIN + pathname },
+        respondWith: async (pending: Promise<Response>) => {
+          const response = await pending
+          resolve({ status: response.status, type: response.headers.get('content-type'), body: await response.text() })
+        }
+      })
+    })
+
+  return { store, publish, fetch }
+}
+
+const SITE = [
+  { path: 'index.html', content: '<h1>Home</h1>' },
+  { path: 'styles.css', content: 'body { margin: 0 }' },
+  { path: 'pages/about us.html', content: '<h1>About</h1>' }
+]
+
+test('serves published files by revision and path', async () => {
+  const worker = loadWorker()
+  const { revision } = await worker.publish(SITE)
+
+  assert.deepEqual(await worker.fetch(`/preview-fs/${revision}/`), {
+    status: 200, type: 'text/html; charset=utf-8', body: '<h1>Home</h1>'
+  })
+  assert.equal((await worker.fetch(`/preview-fs/${revision}/styles.css`)).type, 'text/css; charset=utf-8')
+  assert.equal((await worker.fetch(`/preview-fs/${revision}/pages/about%20us.html`)).body, '<h1>About</h1>')
+  assert.equal((await worker.fetch(`/preview-fs/${revision}/missing.js`)).status, 404)
+})
+
+test('the same files make the same revision in any order', async () => {
+  const worker = loadWorker()
+  const first = await worker.publish(SITE)
+  const second = await worker.publish([...SITE].reverse())
+  assert.equal(second.revision, first.revision)
+})
+
+test('keeps ten revisions and drops files only retired ones used', async () => {
+  const worker = loadWorker()
+  const { revision: oldest } = await worker.publish(SITE)
+  for (let i = 0; i < 12; i++) {
+    await worker.publish([{ path: 'index.html', content: `<h1>Version ${i}</h1>` }, SITE[1]])
+  }
+
+  const keys = [...worker.store.keys()]
+  assert.equal(keys.filter(key => key.includes('/__manifest/')).length, 10)
+  // Ten index pages plus the shared stylesheet
+  assert.equal(keys.filter(key => key.includes('/__blob/')).length, 11)
+  assert.equal((await worker.fetch(`/preview-fs/${oldest}/`)).status, 404)
+})
@@ -0,0 +1,74 @@
+import { test, beforeEach } from 'node:test'
+import assert from 'node:assert/strict'
+import { FakeIndexedDB } from './support/indexeddb.ts'
+
+// Drives lib/result-store.ts against an in-memory IndexedDB. Each load of the
+// module starts with no hot copy, like a reloaded tab.
+
+const globals = globalThis as any
+let instance = 0
+let now = 0
+
+async function loadStore() {
+  return import(`../lib/result-store.ts?instance=${instance++}`)
+}
+
+beforeEach(() => {
+  globals.window = new EventTarget()
+  globals.indexedDB = new FakeIndexedDB()
+  Date.now = () => ++now
+})
+
+test('a stored result loads by id after a reload', async () => {
+  await (await loadStore()).storeResult({ projectId: 'a', files: { files: [] } })
+
+  const reloaded = await loadStore()
+  assert.equal(reloaded.latestResult(), undefined)
+  assert.deepEqual(await reloaded.loadResult('a'), { projectId: 'a', files: { files: [] } })
+  assert.equal(reloaded.latestResult().projectId, 'a')
+  assert.equal(await reloaded.loadResult('missing'), undefined)
+})
+
+test('without an id the most recently opened project loads', async () => {
+  const store = await loadStore()
+  await store.storeResult({ projectId: 'a' })
+  await store.storeResult({ projectId: 'b' })
+  await (await loadStore()).loadResult('a')
+
+  assert.equal((await (await loadStore()).loadResult()).projectId, 'a')
+})
+
+test('the hot copy is not used for a different project', async () => {
+  const store = await loadStore()
+  await store.storeResult({ projectId: 'a' })
+  await store.storeResult({ projectId: 'b' })
+
+  assert.equal(store.latestResult().projectId, 'b')
+  assert.equal((await store.loadResult('a')).projectId, 'a')
+})
+
+test('partial results and results without an id are not saved', async () => {
+  const store = await loadStore()
+  await store.storeResult({ projectId: 'a', isLoading: true })
+  await store.storeResult({ files: { files: [] } })
+
+  assert.equal(store.latestResult().projectId, undefined)
+  assert.deepEqual(globals.indexedDB.records('sorena-results', 'projects'), [])
+})
+
+test('projects beyond the limit are evicted, least recently opened first', async () => {
+  const store = await loadStore()
+  for (let i = 0; i < 20; i++) await store.storeResult({ projectId: `p${i}` })
+  // Opening the oldest keeps it
+  await (await loadStore()).loadResult('p0')
+  await store.storeResult({ projectId: 'p20' })
+  await store.storeResult({ projectId: 'p21' })
+
+  const ids = globals.indexedDB.records('sorena-results', 'projects').map((record: any) => record.projectId)
+  assert.equal(ids.length, 20)
+  assert.ok(ids.includes('p0'))
+  assert.ok(!ids.includes('p1'))
+  assert.ok(!ids.includes('p2'))
+  assert.ok(ids.includes('p3'))
+  assert.ok(ids.includes('p21'))
+})
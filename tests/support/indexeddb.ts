@@ -0,0 +1,177 @@
+// A small in-memory IndexedDB, covering what lib/result-store.ts uses: one
+// database with object stores keyed by keyPath, single-key indexes, get, put,
+// count and cursors. Requests complete as separate tasks, and a transaction
+// completes once a task passes with none of its requests left pending, as in
+// the browser.
+
+type Value = Record<string, any>
+
+class FakeRequest<T = any> {
+  result: T | undefined
+  error: Error | null = null
+  onsuccess: (() => void) | null = null
+  onerror: (() => void) | null = null
+  onupgradeneeded: (() => void) | null = null
+
+  succeed(result: T) {
+    this.result = result
+    this.onsuccess?.()
+  }
+}
+
+class FakeStoreData {
+  records = new Map<any, Value>()
+  indexes = new Map<string, string>()
+  keyPath: string
+
+  constructor(keyPath: string) {
+    this.keyPath = keyPath
+  }
+}
+
+class FakeTransaction {
+  oncomplete: (() => void) | null = null
+  onerror: (() => void) | null = null
+  onabort: (() => void) | null = null
+  error: Error | null = null
+  private pending = 0
+  private finished = false
+  private stores: Map<string, FakeStoreData>
+
+  constructor(stores: Map<string, FakeStoreData>) {
+    this.stores = stores
+    this.settle()
+  }
+
+  objectStore(name: string) {
+    const data = this.stores.get(name)
+    if (!data) throw new Error(`No object store named ${name}`)
+    return new FakeObjectStore(this, data)
+  }
+
+  // Runs op as its own task and fires the request's success event
+  request<T>(op: () => T): FakeRequest<T> {
+    if (this.finished) throw new Error('Transaction has finished')
+    const req = new FakeRequest<T>()
+    this.pending++
+    setTimeout(() => {
+      this.pending--
+      req.succeed(op())
+      this.settle()
+    })
+    return req
+  }
+
+  // Promise callbacks run before the next task, so requests they make are
+  // counted before this looks
+  private settle() {
+    setTimeout(() => {
+      if (this.pending || this.finished) return
+      this.finished = true
+      this.oncomplete?.()
+    })
+  }
+}
+
+class FakeObjectStore {
+  private tx: FakeTransaction
+  private data: FakeStoreData
+
+  constructor(tx: FakeTransaction, data: FakeStoreData) {
+    this.tx = tx
+    this.data = data
+  }
+
+  createIndex(name: string, keyPath: string) {
+    this.data.indexes.set(name, keyPath)
+  }
+
+  put(value: Value) {
+    const copy = structuredClone(value)
+    return this.tx.request(() => {
+      this.data.records.set(copy[this.data.keyPath], copy)
+      return copy[this.data.keyPath]
+    })
+  }
+
+  get(key: any) {
+    return this.tx.request(() => {
+      const value = this.data.records.get(key)
+      return value && structuredClone(value)
+    })
+  }
+
+  count() {
+    return this.tx.request(() => this.data.records.size)
+  }
+
+  index(name: string) {
+    const keyPath = this.data.indexes.get(name)
+    if (!keyPath) throw new Error(`No index named ${name}`)
+    return { openCursor: (_range: null = null, direction = 'next') => this.openCursor(keyPath, direction) }
+  }
+
+  // Walks records ordered by the index key; each step is a success event
+  private openCursor(keyPath: string, direction: string) {
+    const ordered = [...this.data.records.values()].sort((a, b) => a[keyPath] - b[keyPath])
+    if (direction === 'prev') ordered.reverse()
+
+    let position = 0
+    const req = this.tx.request(() => step())
+    const step = (): any => {
+      const record = ordered[position]
+      if (!record) return null
+      return {
+        value: structuredClone(record),
+        delete: () => this.tx.request(() => this.data.records.delete(record[this.data.keyPath])),
+        continue: () => {
+          position++
+          this.tx.request(() => req.succeed(step()))
+        }
+      }
+    }
+    return req
+  }
+}
+
+class FakeDatabase {
+  stores = new Map<string, FakeStoreData>()
+  version = 0
+
+  createObjectStore(name: string, options: { keyPath: string }) {
+    const data = new FakeStoreData(options.keyPath)
+    this.stores.set(name, data)
+    return new FakeObjectStore(new FakeTransaction(this.stores), data)
+  }
+
+  transaction(name: string, _mode?: string) {
+    if (!this.stores.has(name)) throw new Error(`No object store named ${name}`)
+    return new FakeTransaction(this.stores)
+  }
+
+  close() {}
+}
+
+export class FakeIndexedDB {
+  private databases = new Map<string, FakeDatabase>()
+
+  open(name: string, version = 1) {
+    const req = new FakeRequest<FakeDatabase>()
+    setTimeout(() => {
+      let db = this.databases.get(name)
+      if (!db) this.databases.set(name, db = new FakeDatabase())
+      req.result = db
+      if (db.version < version) {
+        db.version = version
+        req.onupgradeneeded?.()
+      }
+      req.succeed(db)
+    })
+    return req
+  }
+
+  // Every record of one store, for assertions
+  records(database: string, store: string): Value[] {
+    return [...(this.databases.get(database)?.stores.get(store)?.records.values() ?? [])]
+  }
+}
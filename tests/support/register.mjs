@@ -0,0 +1,5 @@
+// Loaded with --import before the tests: lib/ modules import each other
+// without extensions, as the Next bundler resolves them
+import { register } from 'node:module'
+
+register('./resolve.mjs', import.meta.url)
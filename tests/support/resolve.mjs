@@ -0,0 +1,9 @@
+// Resolves a relative import without an extension to the .ts file beside it
+export async function resolve(specifier, context, nextResolve) {
+  try {
+    return await nextResolve(specifier, context)
+  } catch (error) {
+    if (error?.code !== 'ERR_MODULE_NOT_FOUND' || !/^\.\.?\//.test(specifier)) throw error
+    return nextResolve(`${specifier}.ts`, context)
+  }
+}